@@ -0,0 +1,95 @@
+"""Measure room-journal recovery time as the journal's history grows.
+
+Plays N synthetic events into a fresh journal (with the configured segment
+size, so snapshots and compaction happen as in production), then times
+`recover()` into an empty rooms dict. With snapshots the recovery time should
+stay roughly flat however many events were recorded.
+
+Run from the project root:
+
+    python benchmarks/bench_journal.py [--rooms 50] [--events 1000 10000 100000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# GameRoom opens a DB session; keep the benchmark away from the real database
+os.chdir(tempfile.mkdtemp())
+
+from server.config.questions import TRIVIA_QUESTIONS  # noqa: E402
+from server.journal import FileRoomJournal  # noqa: E402
+from server.models.game_room import GameRoom  # noqa: E402
+
+
+def build_rooms(room_count: int, players: int):
+    rooms = {}
+    for r in range(room_count):
+        room = GameRoom(f'ROOM{r:04d}')
+        room.add_player(f'host{r}', 'Host', is_host=True)
+        for i in range(players):
+            room.add_player(f'sid{r}_{i}', f'Player{i}')
+            room.scores[f'sid{r}_{i}'] = 0
+        room.current_game = 'trivia'
+        room.game_state = 'playing'
+        rooms[room.room_id] = room
+    return rooms
+
+
+async def record_events(journal: FileRoomJournal, rooms, events: int) -> None:
+    room_list = list(rooms.values())
+    for n in range(events):
+        room = random.choice(room_list)
+        sid = random.choice(list(room.player_sids))
+        room.scores[sid] += random.randint(1, 300)
+        room.player_answers[sid] = {'answer': 'x', 'time': random.random() * 20}
+        if n % 20 == 0:
+            room.round = room.round % 5 + 1
+            room.current_question = random.choice(TRIVIA_QUESTIONS)
+            room.player_answers = {}
+        room.state_version += 1
+        journal.record(room)
+        if n % 500 == 0:
+            await asyncio.sleep(0)  # Let the flush loop run
+    await journal.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rooms', type=int, default=50)
+    parser.add_argument('--players', type=int, default=8)
+    parser.add_argument('--events', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'events':>8} {'files':>6} {'bytes':>10} {'recover ms':>11}")
+    for events in args.events:
+        path = tempfile.mkdtemp()
+        rooms = build_rooms(args.rooms, args.players)
+        journal = FileRoomJournal(rooms, path)
+        journal.recover()
+        asyncio.run(_run(journal, rooms, events))
+
+        files = os.listdir(path)
+        size = sum(os.path.getsize(os.path.join(path, name)) for name in files)
+        started = time.perf_counter()
+        recovered = FileRoomJournal({}, path)
+        recovered.recover()
+        elapsed = (time.perf_counter() - started) * 1000
+        # recover() starts a snapshot on the journal thread; let it finish first
+        asyncio.run(recovered.stop())
+        print(f"{events:>8} {len(files):>6} {size:>10} {elapsed:>11.1f}")
+        shutil.rmtree(path)
+
+
+async def _run(journal: FileRoomJournal, rooms, events: int) -> None:
+    await journal.start()
+    await record_events(journal, rooms, events)
+
+
+if __name__ == '__main__':
+    main()
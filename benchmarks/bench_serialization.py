@@ -0,0 +1,100 @@
+"""Compare JSON encode time for real room payloads across backends.
+
+Run from the project root:
+
+    python benchmarks/bench_serialization.py [--players 8] [--number 200]
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# GameRoom opens a DB session; keep the benchmark away from the real database
+os.chdir(tempfile.mkdtemp())
+
+from server.config.questions import TRIVIA_QUESTIONS  # noqa: E402
+from server.models.game_room import GameRoom  # noqa: E402
+from server.utils import serialization  # noqa: E402
+
+
+def build_payloads(player_count: int):
+    room = GameRoom('BENCH1')
+    for i in range(player_count):
+        room.add_player(f'sid{i}', f'Player{i}', is_host=(i == 0))
+        room.scores[f'sid{i}'] = random.randint(0, 5000)
+    room.current_game = 'trivia'
+    room.game_state = 'playing'
+    room.current_question = random.choice(TRIVIA_QUESTIONS)
+
+    drawings = [{
+        'player': f'Player{i}',
+        # A canvas data URL is typically tens of kilobytes of base64
+        'data': 'data:image/png;base64,' + base64.b64encode(os.urandom(48 * 1024)).decode(),
+        'timestamp': datetime.now()
+    } for i in range(player_count)]
+
+    return {
+        'round_complete': {
+            'original_word': 'elephant',
+            'final_guess': 'elephant',
+            'scores': room.public_scores(),
+            'drawings': drawings
+        },
+        'game_started': {
+            'game_type': 'trivia',
+            'round': 1,
+            'total_rounds': room.total_rounds,
+            'question': room.current_question,
+            'time_limit': 30,
+            'game_state': 'playing',
+            'scores': room.public_scores(),
+            'start_time': datetime.now().timestamp()
+        },
+        'players': [player.summary() for player in room.players.values()],
+        'state_snapshot': room.get_state_snapshot()
+    }
+
+
+def encoders():
+    found = {'json': lambda obj: json.dumps(obj, default=serialization._default, separators=(',', ':'))}
+    try:
+        import orjson
+        found['orjson'] = lambda obj: orjson.dumps(obj, default=serialization._default,
+                                                  option=orjson.OPT_NON_STR_KEYS)
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        found['msgspec'] = msgspec.json.Encoder(enc_hook=serialization._default).encode
+    except ImportError:
+        pass
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--players', type=int, default=8)
+    parser.add_argument('--number', type=int, default=200)
+    args = parser.parse_args()
+
+    payloads = build_payloads(args.players)
+    backends = encoders()
+    print(f"serialization.BACKEND = {serialization.BACKEND}")
+    print(f"{'payload':<16}{'bytes':>10}" + ''.join(f'{name:>14}' for name in backends))
+    for name, payload in payloads.items():
+        size = len(serialization.dumps_bytes(payload))
+        row = f'{name:<16}{size:>10}'
+        for encode in backends.values():
+            per_call = timeit.timeit(lambda: encode(payload), number=args.number) / args.number
+            row += f'{per_call * 1e6:>12.1f}us'
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Compare database throughput with and without the SQLite storage profile.
+
+For each setup a fresh database file is created and filled the way the server
+fills it: one transaction per player join (`get_or_create_user`), one per
+score insert, then repeated per-game leaderboard reads (top 10 by score for
+one game type, with usernames).
+
+- `default`: SQLite's own settings, single-column indexes only (before)
+- `profile`: `SQLITE_PROFILE` pragmas plus the composite indexes (after)
+
+Run from the project root:
+
+    python benchmarks/bench_storage.py [--users 2000] [--scores 20000] [--reads 2000]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Importing server.database opens ./party_games.db; keep it away from the real one
+os.chdir(tempfile.mkdtemp())
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from server.database import Base, GameScore, User, get_or_create_user  # noqa: E402
+from server.storage import apply_sqlite_profile  # noqa: E402
+
+GAME_TYPES = ('trivia', 'chinese_whispers')
+COMPOSITE_INDEXES = ('ix_game_scores_game_type_score', 'ix_users_highest_score')
+
+
+def make_session(path: str, tuned: bool):
+    engine = create_engine(f'sqlite:///{path}', connect_args={'check_same_thread': False})
+    if tuned:
+        apply_sqlite_profile(engine)
+    Base.metadata.create_all(bind=engine)
+    if not tuned:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name in COMPOSITE_INDEXES:
+                    index.drop(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def rate(count: int, seconds: float) -> str:
+    return f'{count / seconds:>10.0f}/s'
+
+
+def run(tuned: bool, users: int, scores: int, reads: int):
+    directory = tempfile.mkdtemp()
+    engine, Session = make_session(os.path.join(directory, 'bench.db'), tuned)
+
+    started = time.perf_counter()
+    user_ids = []
+    for i in range(users):
+        with Session() as db:
+            user_ids.append(get_or_create_user(db, f'player{i}'))
+            db.commit()
+    join = rate(users, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in range(scores):
+        with Session() as db:
+            db.add(GameScore(user_id=random.choice(user_ids), game_type=random.choice(GAME_TYPES),
+                             score=random.randint(0, 5000), correct_answers=random.randint(0, 5),
+                             total_questions=5))
+            db.commit()
+    insert = rate(scores, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for i in range(reads):
+        with Session() as db:
+            rows = db.query(GameScore.score, User.username) \
+                .join(User, User.id == GameScore.user_id) \
+                .filter(GameScore.game_type == GAME_TYPES[i % len(GAME_TYPES)]) \
+                .order_by(GameScore.score.desc()).limit(10).all()
+            assert len(rows) == 10
+    leaderboard = rate(reads, time.perf_counter() - started)
+
+    engine.dispose()
+    shutil.rmtree(directory)
+    return join, insert, leaderboard
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--scores', type=int, default=20000)
+    parser.add_argument('--reads', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'setup':<8} {'joins':>12} {'score inserts':>14} {'leaderboards':>13}")
+    for name, tuned in (('default', False), ('profile', True)):
+        join, insert, leaderboard = run(tuned, args.users, args.scores, args.reads)
+        print(f'{name:<8} {join:>12} {insert:>14} {leaderboard:>13}')
+
+
+if __name__ == '__main__':
+    main()
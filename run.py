@@ -1,10 +1,24 @@
+import argparse
+
 import uvicorn
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "server.main:create_app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        factory=True
-    )
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the Party Games server")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Number of worker processes; with more than one, each room is pinned to a worker"
+    )
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        from server.routing import run_cluster
+        run_cluster(args.workers, port=args.port)
+    else:
+        uvicorn.run(
+            "server.main:create_app",
+            host="0.0.0.0",
+            port=args.port,
+            reload=True,
+            factory=True
+        )
\ No newline at end of file
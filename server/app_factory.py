@@ -1,4 +1,5 @@
 """Application factory module."""
+import logging
 import os
 from typing import Dict, Any
 
@@ -9,31 +10,62 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
 from server.models.game_room import GameRoom
+from server.utils import serialization
+from server.utils.log import get_logger, setup_logging, shutdown_logging
+
+logger = get_logger('app')
 
 # Global state
 rooms: Dict[str, GameRoom] = {}
+sid_rooms: Dict[str, str] = {}  # Reverse index: connected sid -> room_id
 
 def create_app():
     """Create and configure the application."""
     # Import here to avoid circular imports
     import asyncio
-    from server.database import init_db, Base, engine
+    from server.database import init_db, db_executor, result_writer
+    from server.cluster import create_room_directory
+    from server.journal import create_room_journal
+    from server.leaderboard import leaderboards
+    from server.lifecycle import RoomLifecycle
     from server.routes import register_routes
     from server.sockets import register_socket_events
+    from server.sockets.rate_limit import EventRateLimiter
+    from server.sockets.afk import AfkTracker
+    from server.sockets.schemas import EventValidator
+    from server.utils.clock import get_clock
+    from server.utils.scheduler import RoundScheduler
+    from server.config.game_config import GAME_CONFIG
+
+    # Queue-backed logging so handlers never block on stdout
+    setup_logging()
 
-    # Initialize database
-    Base.metadata.create_all(bind=engine)
+    # Create the schema (once per process)
     init_db()
+    # Keep the in-memory leaderboards current as game results are written
+    result_writer.on_written(leaderboards.record_batch)
 
     # Initialize rooms dict with lock
     rooms_lock = asyncio.Lock()
+    # Shared room directory (Redis-backed when clustered mode is configured)
+    directory = create_room_directory(rooms)
+    # Rebuild rooms that were in progress when the last process stopped
+    journal = create_room_journal(rooms)
+    recovered_rooms = journal.recover()
+    # Shared time source; swap in a SimulatedClock with set_clock() before create_app()
+    clock = get_clock()
+    # Per-connection / per-room budgets for inbound socket events
+    limiter = EventRateLimiter(clock=clock.now)
+    # Compiled schemas for inbound socket payloads
+    validator = EventValidator()
     # Create FastAPI app
     app = FastAPI(
         title="Party Games Hub",
         description="A collection of fun multiplayer party games",
         version="1.0.0",
         docs_url=None,  # Disable docs in production
-        redoc_url=None  # Disable redoc in production
+        redoc_url=None,  # Disable redoc in production
+        default_response_class=serialization.FastJSONResponse
     )
 
     # Initialize templates early for exception handler
@@ -43,7 +75,7 @@ def create_app():
 
     @app.exception_handler(Exception)
     async def global_exception_handler(request, exc):
-        print(f"Global exception handler caught: {exc}")
+        logger.exception("Global exception handler caught: %s", exc, exc_info=exc, extra={'event': 'unhandled_exception'})
         return templates.TemplateResponse(
             "error.html",
             {
@@ -69,9 +101,9 @@ def create_app():
         cors_allowed_origins='*',
         ping_timeout=60000,  # Increased timeout for mobile networks (in ms)
         ping_interval=25000,  # Ping interval in ms
-        max_http_buffer_size=1e8,  # 100MB max message size
-        logger=True,
-        engineio_logger=True,
+        max_http_buffer_size=GAME_CONFIG['rate_limits']['max_message_bytes'],
+        logger=get_logger('socketio'),
+        engineio_logger=get_logger('engineio'),
         reconnection=True,
         reconnection_attempts=10,  # More retry attempts
         reconnection_delay=1000,
@@ -80,7 +112,8 @@ def create_app():
         http_compression=True,  # Enable compression
         transports=['websocket', 'polling'],  # Support both WebSocket and polling
         async_handlers=True,  # Enable async handlers
-        json=None  # Use default JSON serializer
+        json=serialization,  # orjson/msgspec when installed, stdlib otherwise
+        client_manager=directory.client_manager  # None unless clustered
     )
 
     # Set up static files
@@ -100,15 +133,11 @@ def create_app():
     # Mount static files
     app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
-    # Print static directory structure for debugging
-    print("\nStatic directory structure:")
-    for root, dirs, files in os.walk(STATIC_DIR):
-        level = root.replace(STATIC_DIR, '').count(os.sep)
-        indent = ' ' * 4 * level
-        print(f"{indent}{os.path.basename(root)}/")
-        subindent = ' ' * 4 * (level + 1)
-        for f in files:
-            print(f"{subindent}{f}")
+    # Log static directory structure for debugging
+    if logger.isEnabledFor(logging.DEBUG):
+        for root, dirs, files in os.walk(STATIC_DIR):
+            logger.debug("Static dir %s: %s", os.path.relpath(root, STATIC_DIR), files,
+                         extra={'event': 'static_dir'})
 
     # Add static files to templates context
     templates.env.globals.update({
@@ -123,7 +152,7 @@ def create_app():
         try:
             return templates.TemplateResponse("index.html", {"request": request})
         except Exception as e:
-            print(f"Error serving index page: {e}")
+            logger.exception("Error serving index page: %s", e, extra={'event': 'index_failed'})
             return templates.TemplateResponse("error.html", {
                 "request": request,
                 "error": "An error occurred loading the page. Please try again.",
@@ -131,33 +160,93 @@ def create_app():
             })
 
     # Register routes and socket events
-    register_routes(app, templates, rooms)
-    register_socket_events(sio, rooms)
+    # Idle rooms are closed and everything they hold released
+    lifecycle = RoomLifecycle(rooms, sid_rooms, clock=clock.now)
+    for room_id in recovered_rooms:
+        lifecycle.touch(room_id)
+    register_routes(app, templates, rooms, directory, lifecycle)
+    # One timer loop owns every room's round deadlines
+    scheduler = RoundScheduler(clock=clock.now)
+    resume_round = register_socket_events(sio, rooms, sid_rooms, directory, scheduler, journal, lifecycle)
+    # Validate on the worker that handles the event; cluster routing needs the raw payload
+    validator.install(sio)
+    # Activity is tracked where the room lives, so inside the routing
+    afk = AfkTracker(rooms, clock=clock.now)
+    afk.install(sio, sid_rooms)
+    lifecycle.install(sio)
+    for release in (limiter.forget_room, scheduler.cancel_room, journal.forget, directory.unregister):
+        lifecycle.on_release(release)
+    directory.install(sio, sid_rooms)
+    # Installed last so events are limited before being forwarded to another worker
+    limiter.install(sio, sid_rooms)
+
+    @app.get("/api/stats/rate_limits")
+    async def rate_limit_stats():
+        """Counters of allowed and dropped socket events."""
+        return limiter.stats()
+
+    @app.get("/api/stats/payloads")
+    async def payload_stats():
+        """Counters of socket payloads rejected by their schema."""
+        return validator.stats()
+
+    @app.get("/api/stats/journal")
+    async def journal_stats():
+        """Room journal size, write batches and the last recovery time."""
+        return journal.stats()
+
+    @app.get("/api/stats/afk")
+    async def afk_stats():
+        """Players tracked for inactivity and how many were warned or kicked."""
+        return afk.stats()
+
+    @app.get("/api/stats/rooms")
+    async def room_stats():
+        """Live rooms, rooms awaiting expiry and how many were warned or evicted."""
+        return lifecycle.stats()
+
+    @app.get("/api/stats/db")
+    async def db_stats():
+        """Database units of work run off the event loop, and batched game-result writes."""
+        return {**db_executor.stats(), 'write_behind': result_writer.stats(),
+                'leaderboards': leaderboards.stats()}
 
     # Create background task for room cleanup
     async def cleanup_rooms(sid, environ):
-        print(f"Client connected: {sid}")
         # Don't clean up rooms during connection, only periodically
+        pass
     
     async def periodic_cleanup():
         while True:
-            await asyncio.sleep(300)  # Run every 5 minutes
-            print("Running periodic room cleanup")
-            for room_id in list(rooms.keys()):
-                room = rooms[room_id]
-                if not room.host_sid or not room.players.get(room.host_sid, {}).get('connected', False):
-                    active_players = sum(1 for p in room.players.values() 
-                                    if p.get('connected', False))
-                    if active_players == 0:
-                        print(f"Removing inactive room: {room_id}")
-                        del rooms[room_id]
-    
+            await clock.sleep(GAME_CONFIG['room_ttl']['check_interval'])
+            try:
+                await lifecycle.sweep(sio)
+            except Exception as e:
+                logger.exception("Room cleanup failed: %s", e, extra={'event': 'cleanup_failed'})
+
+    async def periodic_afk_check():
+        while True:
+            await clock.sleep(GAME_CONFIG['afk_check_interval'])
+            try:
+                await afk.sweep(sio)
+            except Exception as e:
+                logger.exception("AFK sweep failed: %s", e, extra={'event': 'afk_sweep_failed'})
+
     sio.on('connect', cleanup_rooms)
     
     # Start periodic cleanup task
     @app.on_event("startup")
     async def start_cleanup():
+        await directory.start()
+        for room_id in recovered_rooms:
+            await directory.register(room_id)
+            resume_round(room_id)
+        await journal.start()
+        if not leaderboards.shared:
+            await db_executor.run(leaderboards.load)
+        await result_writer.start()
         asyncio.create_task(periodic_cleanup())
+        asyncio.create_task(periodic_afk_check())
 
     # Mount Socket.IO app
     socket_app = socketio.ASGIApp(
@@ -169,10 +258,17 @@ def create_app():
     # Add startup and shutdown handlers
     @app.on_event("startup")
     async def startup_event():
-        print("Socket.IO server started")
+        logger.info("Socket.IO server started", extra={'event': 'server_started'})
 
     @app.on_event("shutdown")
     async def shutdown_event():
-        print("Socket.IO server shutting down")
+        logger.info("Socket.IO server shutting down", extra={'event': 'server_stopping'})
+        scheduler.stop()
+        await journal.stop()
+        # Write out queued game results, then let queued database writes finish
+        await result_writer.stop()
+        await asyncio.get_running_loop().run_in_executor(None, db_executor.shutdown)
+        await directory.stop()
+        shutdown_logging()
 
     return socket_app
\ No newline at end of file
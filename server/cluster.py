@@ -0,0 +1,184 @@
+"""Room directory and optional multi-process (clustered) mode.
+
+By default the server runs as a single process and the directory is just a
+view over the in-process `rooms` dict. Setting PARTY_GAMES_REDIS_URL turns on
+clustered mode:
+
+- Socket.IO uses a Redis client manager, so an emit to a room reaches sockets
+  on every worker.
+- Rooms are registered in a shared Redis hash (room_id -> owning worker), so
+  `/join/{room_id}` and `connect` accept a room no matter which worker hosts it.
+- Each `GameRoom` still lives on exactly one worker. Events from a socket whose
+  room is owned elsewhere are forwarded to the owner over a per-worker Redis
+  channel and handled there; the owner's replies and room changes reach the
+  socket through the client manager.
+"""
+import asyncio
+import json
+import os
+import uuid
+from typing import Any, Dict, Optional
+
+import socketio
+
+from server.models.game_room import GameRoom
+from server.utils.log import get_logger
+
+logger = get_logger('cluster')
+
+REDIS_URL_ENV = 'PARTY_GAMES_REDIS_URL'
+KEY_PREFIX = 'party_games'
+
+# Events that act on a room and may need to run on the room's owner
+ROUTED_EVENTS = (
+    'join_room', 'recover_state', 'start_game', 'submit_drawing',
+    'drawing_update', 'submit_guess', 'submit_answer', 'disconnect'
+)
+# Events that name their room in the payload instead of via sid_rooms
+ROOM_ENTRY_EVENTS = ('join_room', 'recover_state')
+
+
+class RoomDirectory:
+    """In-process room directory used when running a single worker."""
+
+    client_manager: Optional[socketio.AsyncManager] = None
+
+    def __init__(self, rooms: Dict[str, GameRoom]):
+        self.rooms = rooms
+        self.worker_id = 'local'
+
+    async def register(self, room_id: str) -> None:
+        """Announce that this worker now hosts `room_id`."""
+        pass
+
+    async def unregister(self, room_id: str) -> None:
+        """Withdraw `room_id` from the directory."""
+        pass
+
+    async def owner(self, room_id: str) -> Optional[str]:
+        """Return the worker hosting `room_id`, or None if no worker does."""
+        return self.worker_id if room_id in self.rooms else None
+
+    async def exists(self, room_id: str) -> bool:
+        return await self.owner(room_id) is not None
+
+    def install(self, sio: socketio.AsyncServer, sid_rooms: Dict[str, str]) -> None:
+        """Hook event routing into `sio` once all handlers are registered."""
+        pass
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class RedisRoomDirectory(RoomDirectory):
+    """Shared room directory and event forwarding backed by Redis."""
+
+    def __init__(self, rooms: Dict[str, GameRoom], url: str):
+        super().__init__(rooms)
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise RuntimeError(f"{REDIS_URL_ENV} is set but the 'redis' package is not installed")
+
+        self.worker_id = uuid.uuid4().hex
+        self.redis = aioredis.Redis.from_url(url)
+        self.client_manager = socketio.AsyncRedisManager(url, channel=f'{KEY_PREFIX}:socketio')
+        self.rooms_key = f'{KEY_PREFIX}:rooms'
+        self.remote_sids: Dict[str, str] = {}  # {sid: owner worker_id} for sockets whose room lives elsewhere
+        self.sio: Optional[socketio.AsyncServer] = None
+        self.sid_rooms: Dict[str, str] = {}
+        self._inner: Dict[str, Any] = {}  # {event: handler as it was before routing}
+        self._listener = None
+
+    def _channel(self, worker_id: str) -> str:
+        return f'{KEY_PREFIX}:worker:{worker_id}'
+
+    async def register(self, room_id: str) -> None:
+        await self.redis.hset(self.rooms_key, room_id, self.worker_id)
+
+    async def unregister(self, room_id: str) -> None:
+        # Only remove the entry if this worker still owns it
+        owner = await self.redis.hget(self.rooms_key, room_id)
+        if owner is not None and owner.decode() == self.worker_id:
+            await self.redis.hdel(self.rooms_key, room_id)
+
+    async def owner(self, room_id: str) -> Optional[str]:
+        if room_id in self.rooms:
+            return self.worker_id
+        owner = await self.redis.hget(self.rooms_key, room_id)
+        return owner.decode() if owner is not None else None
+
+    def install(self, sio: socketio.AsyncServer, sid_rooms: Dict[str, str]) -> None:
+        self.sio = sio
+        self.sid_rooms = sid_rooms
+        handlers = sio.handlers['/']
+        for event in ROUTED_EVENTS:
+            if event in handlers:
+                # Forwarded events were already rate limited on the receiving worker
+                self._inner[event] = handlers[event]
+                handlers[event] = self._routed(event, handlers[event])
+
+    def _routed(self, event: str, handler):
+        async def route(sid, data=None, *args):
+            owner = await self._route_owner(event, sid, data)
+            if owner is None or owner == self.worker_id:
+                # For disconnect, `data` is the reason python-socketio passes
+                return await handler(sid, data, *args)
+            await self._forward(owner, event, sid, data)
+        return route
+
+    async def _route_owner(self, event: str, sid: str, data: Any) -> Optional[str]:
+        if sid in self.sid_rooms:
+            return self.worker_id
+        if event == 'disconnect':
+            return self.remote_sids.pop(sid, None)
+        if event in ROOM_ENTRY_EVENTS and isinstance(data, dict):
+            owner = await self.owner(data.get('room_id'))
+            if owner is not None and owner != self.worker_id:
+                self.remote_sids[sid] = owner
+            return owner
+        return self.remote_sids.get(sid)
+
+    async def _forward(self, owner: str, event: str, sid: str, data: Any) -> None:
+        message = json.dumps({'event': event, 'sid': sid, 'data': data})
+        await self.redis.publish(self._channel(owner), message)
+
+    async def _listen(self) -> None:
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self._channel(self.worker_id))
+        try:
+            async for message in pubsub.listen():
+                if message.get('type') != 'message':
+                    continue
+                try:
+                    forwarded = json.loads(message['data'])
+                    handler = self._inner.get(forwarded['event'])
+                    if handler is None:
+                        continue
+                    await handler(forwarded['sid'], forwarded['data'])
+                except Exception as e:
+                    logger.warning("Error handling forwarded event: %s", e, extra={'event': 'forward_failed'})
+        finally:
+            await pubsub.unsubscribe(self._channel(self.worker_id))
+
+    async def start(self) -> None:
+        self._listener = asyncio.create_task(self._listen())
+        logger.info("Clustered mode enabled, worker %s", self.worker_id, extra={'event': 'cluster_started'})
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+        for room_id in list(self.rooms.keys()):
+            await self.unregister(room_id)
+        await self.redis.aclose()
+
+
+def create_room_directory(rooms: Dict[str, GameRoom]) -> RoomDirectory:
+    """Build the room directory for this process (clustered if configured)."""
+    url = os.environ.get(REDIS_URL_ENV)
+    if url:
+        return RedisRoomDirectory(rooms, url)
+    return RoomDirectory(rooms)
@@ -9,6 +9,8 @@ GAME_CONFIG = {
     'trivia_time': 20,       # default time per trivia question
     'rounds_per_game': 5,    # increased for better game progression
     'idle_timeout': 120,     # how many seconds before AFK?
+    'afk_kick_timeout': 300, # idle seconds before an AFK player is disconnected
+    'afk_check_interval': 5, # seconds between AFK sweeps
     'round_transition_delay': 3,  # seconds between rounds
 
     # Points & scoring
@@ -24,6 +26,61 @@ GAME_CONFIG = {
         'time_bonus_multiplier': 0.5  # multiply by remaining time percentage
     },
 
+    # Live drawing relay (Chinese Whispers)
+    'stroke_relay': {
+        'tick_rate': 30,              # batched frames per second
+        'max_pending_segments': 512   # per drawer, per tick
+    },
+
+    # Versioned state sync for reconnecting clients
+    'state_sync': {
+        'history_size': 64   # deltas kept per room before falling back to a snapshot
+    },
+
+    # Inbound socket event budgets: token buckets of `rate` events per second
+    # refilling up to `burst`. Events over budget are dropped.
+    'rate_limits': {
+        'max_message_bytes': 5_000_000,   # largest single Socket.IO message (drawings, profile pictures)
+        'per_sid': {
+            'default': {'rate': 5, 'burst': 20},
+            'join_room': {'rate': 0.5, 'burst': 5},
+            'recover_state': {'rate': 0.5, 'burst': 5},
+            'start_game': {'rate': 0.5, 'burst': 3},
+            'submit_drawing': {'rate': 0.5, 'burst': 3},
+            'drawing_update': {'rate': 120, 'burst': 240},
+            'submit_guess': {'rate': 2, 'burst': 5},
+            'submit_answer': {'rate': 2, 'burst': 5}
+        },
+        'per_room': {
+            'default': {'rate': 50, 'burst': 200},
+            'drawing_update': {'rate': 240, 'burst': 480}
+        }
+    },
+
+    # Idle rooms are closed this many seconds after their last activity
+    'room_ttl': {
+        'idle': 1800,          # while someone is still connected
+        'empty': 300,          # once nobody is (or nobody ever joined)
+        'warning': 60,         # 'room_expiring' is sent this long before closing
+        'check_interval': 5    # seconds between sweeps
+    },
+
+    # Crash recovery: append-only journal of room state (see server/journal.py)
+    'journal': {
+        'enabled': True,
+        'path': 'journal',            # directory, relative to the working directory
+        'segment_bytes': 4_000_000,   # past this a new segment starts and a snapshot is taken
+        'flush_interval': 0.05        # seconds between batched writes (one fsync each)
+    },
+
+    # Size limits for validated inbound event payloads (characters)
+    'payload_limits': {
+        'room_id': 16,
+        'player_name': 20,
+        'text': 200,             # guesses and answers
+        'image': 4_000_000       # data URLs: drawings and profile pictures
+    },
+
     # Maximum consecutive skips allowed (Chinese Whispers)
     'max_consecutive_skips': 2,
 
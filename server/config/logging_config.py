@@ -0,0 +1,35 @@
+# server/config/logging_config.py
+
+LOGGING_CONFIG = {
+    'level': 'INFO',          # root level for party_games.* loggers
+    'json': True,             # one JSON object per line; False for plain text
+    'queue_size': 10000,      # records buffered before new ones are dropped
+
+    # Per-subsystem levels (logger name is party_games.<subsystem>)
+    'subsystems': {
+        'app': 'INFO',
+        'routes': 'INFO',
+        'sockets': 'INFO',
+        'cluster': 'INFO',
+        'relay': 'WARNING',
+        'scheduler': 'INFO',
+        'journal': 'INFO',
+        'lifecycle': 'INFO',
+        'db': 'INFO',
+        'proxy': 'WARNING',
+        'socketio': 'WARNING',   # python-socketio internals
+        'engineio': 'WARNING'    # per-packet transport logs
+    },
+
+    # Keep this fraction of records for an event (by the `event` extra field)
+    'sampling': {
+        'join_request': 0.1,
+        'client_connected': 0.1,
+        'client_disconnected': 0.1
+    },
+
+    # Token bucket per event: sustained records per second, and burst size
+    'rate_limits': {
+        'default': {'rate': 50, 'burst': 200}
+    }
+}
@@ -1,16 +1,44 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, LargeBinary
+from sqlalchemy import (
+    create_engine, bindparam, case, func, insert, literal, select,
+    Column, Index, Integer, String, Float, DateTime, LargeBinary
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+import asyncio
 import os
+import time
+
+from server.storage import apply_sqlite_profile
+from server.utils.log import get_logger
+
+logger = get_logger('db')
+
+T = TypeVar('T')
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./party_games.db"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
+apply_sqlite_profile(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Database work from async code runs on this many threads...
+DB_WORKERS = 2
+# ...with at most this many units of work queued or running at once
+DB_MAX_PENDING = 256
+# Game results are queued and written together once this many rows are
+# waiting or this many seconds have passed, whichever comes first
+WRITE_BEHIND_BATCH = 500
+WRITE_BEHIND_INTERVAL = 2.0
+# BestScore.game_type of the across-games leaderboard
+OVERALL_GAME_TYPE = '*'
+
 Base = declarative_base()
 
 class User(Base):
@@ -24,6 +52,10 @@ class User(Base):
     total_score = Column(Integer, default=0)
     highest_score = Column(Integer, default=0)
 
+    __table_args__ = (
+        Index('ix_users_highest_score', highest_score.desc()),  # Overall leaderboard
+    )
+
 class GameScore(Base):
     __tablename__ = "game_scores"
 
@@ -35,6 +67,28 @@ class GameScore(Base):
     total_questions = Column(Integer)
     played_at = Column(DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        # Per-game leaderboard: top scores for one game type, read in index order
+        Index('ix_game_scores_game_type_score', game_type, score.desc()),
+    )
+
+class BestScore(Base):
+    """Each user's best score per game type, and overall (`OVERALL_GAME_TYPE`).
+
+    Upserted with every batch of game results, so leaderboards never scan
+    `game_scores`. Ranked by score, then whoever reached it first.
+    """
+    __tablename__ = "best_scores"
+
+    game_type = Column(String, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    score = Column(Integer, nullable=False)
+    reached_at = Column(DateTime)
+
+    __table_args__ = (
+        Index('ix_best_scores_rank', game_type, score.desc(), reached_at, user_id),
+    )
+
 class Achievement(Base):
     __tablename__ = "achievements"
 
@@ -44,8 +98,40 @@ class Achievement(Base):
     description = Column(String)
     unlocked_at = Column(DateTime, default=datetime.utcnow)
 
+_schema_ready = False
+
 def init_db():
+    """Create missing tables and indexes; only the first call does any work."""
+    global _schema_ready
+    if _schema_ready:
+        return
     Base.metadata.create_all(bind=engine)
+    # create_all only indexes tables it creates; add indexes introduced since
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    _backfill_best_scores()
+    _schema_ready = True
+
+def _backfill_best_scores():
+    # Databases from before best_scores existed: derive it from the history once
+    with engine.begin() as conn:
+        if conn.execute(select(BestScore.user_id).limit(1)).first() is not None:
+            return
+        best = func.max(GameScore.score)
+        # SQLite takes played_at from the row holding the max score
+        conn.execute(insert(BestScore).from_select(
+            ['game_type', 'user_id', 'score', 'reached_at'],
+            select(GameScore.game_type, GameScore.user_id, best, GameScore.played_at)
+            .where(GameScore.user_id.is_not(None), GameScore.score.is_not(None))
+            .group_by(GameScore.game_type, GameScore.user_id)
+        ))
+        conn.execute(insert(BestScore).from_select(
+            ['game_type', 'user_id', 'score', 'reached_at'],
+            select(literal(OVERALL_GAME_TYPE), GameScore.user_id, best, GameScore.played_at)
+            .where(GameScore.user_id.is_not(None), GameScore.score.is_not(None))
+            .group_by(GameScore.user_id)
+        ))
 
 def get_db():
     db = SessionLocal()
@@ -54,5 +140,292 @@ def get_db():
     finally:
         db.close()
 
-# Initialize database on import
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+
+class DatabaseExecutor:
+    """Runs database work on a thread pool so the event loop never blocks on SQLite.
+
+    Each unit of work is a function taking a fresh `Session`; it is committed
+    if the function returns, rolled back if it raises, and closed either way.
+    Return plain values (IDs, dicts) rather than ORM objects, which are
+    detached once the session closes.
+
+    At most `max_pending` units are queued or running at a time; further
+    callers wait for a slot rather than growing the queue without bound.
+    """
+
+    def __init__(self, max_workers: int = DB_WORKERS, max_pending: int = DB_MAX_PENDING):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db')
+        self._slots = asyncio.Semaphore(max_pending)
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.max_wait_ms = 0.0
+        self.total_work_ms = 0.0
+
+    async def run(self, work: Callable[[Session], T]) -> T:
+        """Run `work(session)` in its own transaction and return its result."""
+        queued = time.perf_counter()
+        async with self._slots:
+            self.in_flight += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._executor, self._unit_of_work, work, queued)
+            finally:
+                self.in_flight -= 1
+
+    def submit(self, work: Callable[[Session], Any]) -> asyncio.Task:
+        """Run `work` in the background; failures are logged rather than raised."""
+        task = asyncio.get_running_loop().create_task(self.run(work))
+        task.add_done_callback(self._log_failure)
+        return task
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background database write failed: %s", task.exception(),
+                           extra={'event': 'db_write_failed'})
+
+    def _unit_of_work(self, work: Callable[[Session], T], queued: float) -> T:
+        started = time.perf_counter()
+        self.max_wait_ms = max(self.max_wait_ms, (started - queued) * 1000)
+        session = SessionLocal()
+        try:
+            result = work(session)
+            session.commit()
+            self.completed += 1
+            return result
+        except Exception:
+            session.rollback()
+            self.failed += 1
+            raise
+        finally:
+            session.close()
+            self.total_work_ms += (time.perf_counter() - started) * 1000
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'completed': self.completed,
+            'failed': self.failed,
+            'in_flight': self.in_flight,
+            'max_wait_ms': round(self.max_wait_ms, 3),
+            'avg_work_ms': round(self.total_work_ms / max(1, self.completed + self.failed), 3)
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+
+
+db_executor = DatabaseExecutor()
+
+
+def get_or_create_user(db: Session, username: str, profile_picture: Optional[bytes] = None) -> int:
+    """ID of the user named `username`, creating them if needed."""
+    user = db.query(User).filter(User.username == username).first()
+    if not user:
+        user = User(username=username)
+        db.add(user)
+        try:
+            db.flush()
+        except IntegrityError:
+            # A join on another DB thread created the same user since our SELECT
+            db.rollback()
+            user = db.query(User).filter(User.username == username).one()
+    if profile_picture:
+        user.profile_picture = profile_picture
+    db.flush()
+    return user.id
+
+
+class WriteBehindQueue:
+    """Collects game results from every room and writes them in batches.
+
+    Scores, achievements and user stat updates are queued in memory and
+    written together in one transaction (multi-row inserts, one UPDATE per
+    user, `BestScore` upserts) every `flush_interval` seconds, or as soon as
+    `max_batch` rows are waiting. Stat updates for the same user are merged before writing.
+    `stop()` flushes whatever is left, so results survive a clean shutdown.
+
+    With `synchronous=True` every add is written immediately on the calling
+    thread, which is handy for tests.
+
+    Listeners registered with `on_written` see each batch once it has been
+    committed, on the event loop (or the calling thread when synchronous).
+    """
+
+    def __init__(self, executor: DatabaseExecutor = db_executor, max_batch: int = WRITE_BEHIND_BATCH,
+                 flush_interval: float = WRITE_BEHIND_INTERVAL, synchronous: bool = False):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.synchronous = synchronous
+        self._scores: List[Dict[str, Any]] = []
+        self._achievements: List[Dict[str, Any]] = []
+        self._user_stats: Dict[int, Dict[str, int]] = {}  # {user_id: merged update}
+        self._flush_task: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[..., Any]] = []
+        self.batches = 0
+        self.rows = 0
+
+    def add_score(self, user_id: int, game_type: str, score: int,
+                  correct_answers: int, total_questions: int) -> None:
+        self._scores.append({
+            'user_id': user_id, 'game_type': game_type, 'score': score,
+            'correct_answers': correct_answers, 'total_questions': total_questions,
+            'played_at': datetime.utcnow()
+        })
+        self._queued()
+
+    def add_achievement(self, user_id: int, name: str, description: str) -> None:
+        self._achievements.append({
+            'user_id': user_id, 'name': name, 'description': description,
+            'unlocked_at': datetime.utcnow()
+        })
+        self._queued()
+
+    def add_game_played(self, user_id: int, score: int) -> None:
+        """Count a finished game towards a user's totals and best score."""
+        stats = self._user_stats.get(user_id)
+        if stats is None:
+            stats = self._user_stats[user_id] = {'b_id': user_id, 'b_games': 0, 'b_total': 0, 'b_best': 0}
+        stats['b_games'] += 1
+        stats['b_total'] += score
+        stats['b_best'] = max(stats['b_best'], score)
+        self._queued()
+
+    def on_written(self, listener: Callable[..., Any]) -> None:
+        """Call `listener(scores, user_stats, usernames)` after each committed batch.
+
+        `scores` are the inserted GameScore rows, `user_stats` the merged
+        per-user updates and `usernames` maps every user ID in the batch to
+        its username.
+        """
+        self._listeners.append(listener)
+
+    def pending(self) -> int:
+        return len(self._scores) + len(self._achievements) + len(self._user_stats)
+
+    def _queued(self) -> None:
+        if self.synchronous:
+            self.flush_sync()
+        elif self.pending() >= self.max_batch and self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+
+    def _take_batch(self):
+        batch = (self._scores, self._achievements, list(self._user_stats.values()))
+        self._scores, self._achievements, self._user_stats = [], [], {}
+        return batch
+
+    async def flush(self) -> None:
+        """Write everything queued so far in one transaction."""
+        self._flush_task = None
+        if self.pending():
+            batch = self._take_batch()
+            try:
+                usernames = await self.executor.run(lambda db: self._write_batch(batch, db))
+            except Exception:
+                self._requeue(batch)
+                raise
+            self._written(batch, usernames)
+
+    def flush_sync(self) -> None:
+        """Write everything queued so far, blocking the calling thread."""
+        if self.pending():
+            batch = self._take_batch()
+            try:
+                with SessionLocal() as db:
+                    usernames = self._write_batch(batch, db)
+                    db.commit()
+            except Exception:
+                self._requeue(batch)
+                raise
+            self._written(batch, usernames)
+
+    def _written(self, batch, usernames: Dict[int, str]) -> None:
+        scores, _, user_stats = batch
+        for listener in self._listeners:
+            try:
+                listener(scores, user_stats, usernames)
+            except Exception as e:
+                logger.warning("Write-behind listener failed: %s", e, extra={'event': 'db_listener_failed'})
+
+    def _requeue(self, batch) -> None:
+        # A failed batch goes back in front of anything queued meanwhile
+        scores, achievements, user_stats = batch
+        self._scores[:0] = scores
+        self._achievements[:0] = achievements
+        for stats in user_stats:
+            merged = self._user_stats.get(stats['b_id'])
+            if merged is None:
+                self._user_stats[stats['b_id']] = stats
+            else:
+                merged['b_games'] += stats['b_games']
+                merged['b_total'] += stats['b_total']
+                merged['b_best'] = max(merged['b_best'], stats['b_best'])
+
+    def _write_batch(self, batch, db: Session) -> Dict[int, str]:
+        scores, achievements, user_stats = batch
+        if scores:
+            db.execute(insert(GameScore), scores)
+            self._upsert_best_scores(scores, db)
+        if achievements:
+            db.execute(insert(Achievement), achievements)
+        if user_stats:
+            users = User.__table__
+            best = func.coalesce(users.c.highest_score, 0)
+            db.connection().execute(
+                users.update()
+                .where(users.c.id == bindparam('b_id'))
+                .values(
+                    games_played=func.coalesce(users.c.games_played, 0) + bindparam('b_games'),
+                    total_score=func.coalesce(users.c.total_score, 0) + bindparam('b_total'),
+                    highest_score=case((best < bindparam('b_best'), bindparam('b_best')), else_=best)
+                ),
+                user_stats
+            )
+        self.batches += 1
+        self.rows += len(scores) + len(achievements) + len(user_stats)
+
+        if not self._listeners:
+            return {}
+        user_ids = {row['user_id'] for row in scores} | {stats['b_id'] for stats in user_stats}
+        return dict(db.execute(select(User.id, User.username).where(User.id.in_(user_ids))).all())
+
+    @staticmethod
+    def _upsert_best_scores(scores: List[Dict[str, Any]], db: Session) -> None:
+        bests = []
+        for row in scores:
+            best = {'user_id': row['user_id'], 'score': row['score'], 'reached_at': row['played_at']}
+            bests.append({**best, 'game_type': row['game_type']})
+            bests.append({**best, 'game_type': OVERALL_GAME_TYPE})
+        stmt = sqlite_insert(BestScore.__table__)
+        db.connection().execute(stmt.on_conflict_do_update(
+            index_elements=['game_type', 'user_id'],
+            set_={'score': stmt.excluded.score, 'reached_at': stmt.excluded.reached_at},
+            where=stmt.excluded.score > BestScore.__table__.c.score
+        ), bests)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception("Write-behind flush failed: %s", e, extra={'event': 'db_flush_failed'})
+
+    def stats(self) -> Dict[str, Any]:
+        return {'pending': self.pending(), 'batches': self.batches, 'rows': self.rows}
+
+    async def start(self) -> None:
+        if self._task is None and not self.synchronous:
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+
+result_writer = WriteBehindQueue()
+
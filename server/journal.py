@@ -0,0 +1,342 @@
+"""Append-only journal of room state, replayed after a restart or crash.
+
+Rooms live only in the in-process `rooms` dict, so a reload or crash would
+otherwise end every game in progress. With the journal enabled:
+
+- After each handled event the room's durable state
+  (`GameRoom.get_durable_state`) is compared with what was last journaled,
+  and only the change is encoded and appended as one JSON line: fields that
+  changed, and for per-player tables (`GameRoom.DURABLE_TABLES`) just the
+  entries that were set or removed. Comparing needs no encoding, so an
+  answer or score change costs one entry, not the whole table.
+- Lines are buffered and written in batches by a single background thread,
+  with one fsync per batch, so the event loop never touches the disk.
+- The journal is split into numbered segments. When a segment fills up a new
+  one is started and a full snapshot of every room is written (the only time
+  whole rooms are encoded); the snapshot makes all earlier segments (and
+  snapshots) redundant, so they are deleted.
+- On startup the newest snapshot is loaded and only the segments after it
+  are replayed. Replay work is bounded by the snapshot size plus one segment,
+  not by how long the server has been running.
+
+Records look like `{"op":"set","room":"AB12CD","state":{<changed fields>},
+"entries":{<table>:{<key>:<value>}},"removed":{<table>:[<key>]}}` (empty
+parts left out) and `{"op":"del","room":"AB12CD"}`. A torn line at the end
+of a segment (a crash mid-write) ends the replay of that segment.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from server.config.game_config import GAME_CONFIG
+from server.models.game_room import GameRoom
+from server.utils.log import get_logger
+from server.utils.serialization import dumps_bytes, loads
+
+logger = get_logger('journal')
+
+WORKER_INDEX_ENV = 'PARTY_GAMES_WORKER_INDEX'  # Set by the multi-worker launcher
+SEGMENT_PREFIX, SEGMENT_SUFFIX = 'segment-', '.log'
+SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX = 'snapshot-', '.json'
+_MISSING = object()
+
+
+def apply_record(states: Dict[str, Dict[str, Any]], record: Dict[str, Any]) -> None:
+    """Apply one `set` record to `{room_id: durable state}`."""
+    state = states.setdefault(record['room'], {})
+    state.update(record.get('state', ()))
+    for table, entries in record.get('entries', {}).items():
+        state.setdefault(table, {}).update(entries)
+    for table, keys in record.get('removed', {}).items():
+        entries = state.get(table)
+        if entries is not None:
+            for key in keys:
+                entries.pop(key, None)
+
+
+class RoomJournal:
+    """Journal that records nothing; used when journaling is disabled."""
+
+    def __init__(self, rooms: Dict[str, GameRoom]):
+        self.rooms = rooms
+
+    def record(self, room: GameRoom) -> None:
+        """Journal whatever changed in `room` since it was last recorded."""
+        pass
+
+    def forget(self, room_id: str) -> None:
+        """Journal that `room_id` no longer exists."""
+        pass
+
+    def recover(self) -> List[str]:
+        """Rebuild journaled rooms into `rooms`; returns their IDs."""
+        return []
+
+    def stats(self) -> Dict[str, Any]:
+        return {'enabled': False}
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class FileRoomJournal(RoomJournal):
+    """Segmented journal files plus snapshots in one directory."""
+
+    def __init__(self, rooms: Dict[str, GameRoom], path: str,
+                 segment_bytes: Optional[int] = None, flush_interval: Optional[float] = None):
+        super().__init__(rooms)
+        config = GAME_CONFIG['journal']
+        self.path = path
+        self.segment_bytes = segment_bytes if segment_bytes is not None else config['segment_bytes']
+        self.flush_interval = flush_interval if flush_interval is not None else config['flush_interval']
+        # {room_id: durable state} as of the last record, decoded from what was
+        # written so live objects are never shared; also the snapshot source
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._pending: List[bytes] = []
+        self._segment = 1
+        self._segment_size = 0
+        # One thread does all file I/O, so writes and compactions stay in order
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='journal')
+        self._file = None  # Open segment; only used on the journal thread
+        self._file_segment = 0
+        self._task: Optional[asyncio.Task] = None
+        self.records = 0
+        self.flushes = 0
+        self.snapshots = 0
+        self.recovered_rooms = 0
+        self.recovery_ms: Optional[float] = None
+
+    # Recording (event loop)
+
+    def record(self, room: GameRoom) -> None:
+        last = self._states.setdefault(room.room_id, {})
+        changed, entries, removed = {}, {}, {}
+        for field, value in room.get_durable_state().items():
+            old = last.get(field, _MISSING)
+            if old == value:
+                continue
+            if field in GameRoom.DURABLE_TABLES and isinstance(old, dict):
+                updated = {key: entry for key, entry in value.items() if old.get(key, _MISSING) != entry}
+                gone = [key for key in old if key not in value]
+                if updated:
+                    entries[field] = updated
+                if gone:
+                    removed[field] = gone
+            else:
+                changed[field] = value
+        if not (changed or entries or removed):
+            return
+        record = {'op': 'set', 'room': room.room_id}
+        if changed:
+            record['state'] = changed
+        if entries:
+            record['entries'] = entries
+        if removed:
+            record['removed'] = removed
+        line = dumps_bytes(record)
+        apply_record(self._states, loads(line))
+        self._append(line)
+
+    def forget(self, room_id: str) -> None:
+        if self._states.pop(room_id, None) is not None:
+            self._append(b'{"op":"del","room":%s}' % dumps_bytes(room_id))
+
+    def _append(self, line: bytes) -> None:
+        self._pending.append(line + b'\n')
+        self._segment_size += len(line) + 1
+        self.records += 1
+        if self._segment_size >= self.segment_bytes:
+            self._roll()
+
+    def _take_pending(self) -> Tuple[int, bytes]:
+        data = b''.join(self._pending)
+        self._pending.clear()
+        return self._segment, data
+
+    def _roll(self) -> None:
+        """Start the next segment and snapshot everything journaled so far."""
+        if self._pending:
+            self._executor.submit(self._write, *self._take_pending())
+        self._segment += 1
+        self._segment_size = 0
+        self._executor.submit(self._write_snapshot, self._segment, self._snapshot_bytes())
+
+    def _snapshot_bytes(self) -> bytes:
+        # Exactly the journaled state
+        return dumps_bytes({'segment': self._segment, 'rooms': self._states})
+
+    async def _flush_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._pending:
+                try:
+                    await loop.run_in_executor(self._executor, self._write, *self._take_pending())
+                except Exception as e:
+                    logger.exception("Journal write failed: %s", e, extra={'event': 'journal_write_failed'})
+
+    # File I/O (journal thread)
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.path, f'{SEGMENT_PREFIX}{segment:08d}{SEGMENT_SUFFIX}')
+
+    def _snapshot_path(self, segment: int) -> str:
+        return os.path.join(self.path, f'{SNAPSHOT_PREFIX}{segment:08d}{SNAPSHOT_SUFFIX}')
+
+    def _write(self, segment: int, data: bytes) -> None:
+        if self._file_segment != segment:
+            self._close_file()
+            self._file = open(self._segment_path(segment), 'ab')
+            self._file_segment = segment
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.flushes += 1
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._file_segment = 0
+
+    def _write_snapshot(self, segment: int, data: bytes) -> None:
+        path = self._snapshot_path(segment)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self.snapshots += 1
+
+        # Everything before `segment` is covered by the snapshot now
+        if self._file_segment < segment:
+            self._close_file()
+        for number, name in self._list(SEGMENT_PREFIX, SEGMENT_SUFFIX):
+            if number < segment:
+                os.remove(os.path.join(self.path, name))
+        for number, name in self._list(SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX):
+            if number < segment:
+                os.remove(os.path.join(self.path, name))
+
+    def _list(self, prefix: str, suffix: str) -> List[Tuple[int, str]]:
+        found = []
+        for name in os.listdir(self.path):
+            if name.startswith(prefix) and name.endswith(suffix):
+                number = name[len(prefix):-len(suffix)]
+                if number.isdigit():
+                    found.append((int(number), name))
+        return sorted(found)
+
+    # Recovery (startup, before any events are handled)
+
+    def recover(self) -> List[str]:
+        started = time.perf_counter()
+        os.makedirs(self.path, exist_ok=True)
+        states, first_segment = self._load_snapshot()
+
+        segments = self._list(SEGMENT_PREFIX, SEGMENT_SUFFIX)
+        replayed = 0
+        for number, name in segments:
+            if number >= first_segment:
+                replayed += self._replay(os.path.join(self.path, name), states)
+
+        recovered = []
+        for room_id, state in states.items():
+            if room_id in self.rooms:
+                continue
+            try:
+                self.rooms[room_id] = GameRoom.from_durable_state(room_id, state)
+            except Exception as e:
+                logger.warning("Could not restore room %s: %s", room_id, e,
+                               extra={'event': 'journal_room_invalid'})
+                continue
+            # A decoded copy: the rebuilt room holds the replayed objects themselves
+            self._states[room_id] = loads(dumps_bytes(self.rooms[room_id].get_durable_state()))
+            recovered.append(room_id)
+
+        # Never append to a segment that may end in a torn line: start a fresh
+        # one and snapshot, so the next recovery reads a single file
+        last_segment = max([number for number, _ in segments] + [first_segment])
+        self._segment = last_segment
+        self._roll()
+
+        self.recovered_rooms = len(recovered)
+        self.recovery_ms = (time.perf_counter() - started) * 1000
+        logger.info("Recovered %d rooms from journal (%d records replayed) in %.1f ms",
+                    len(recovered), replayed, self.recovery_ms, extra={'event': 'journal_recovered'})
+        return recovered
+
+    def _load_snapshot(self) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        """Newest readable snapshot as ({room_id: state}, first segment to replay)."""
+        for number, name in reversed(self._list(SNAPSHOT_PREFIX, SNAPSHOT_SUFFIX)):
+            try:
+                with open(os.path.join(self.path, name), 'rb') as f:
+                    snapshot = loads(f.read())
+                return snapshot['rooms'], number
+            except Exception as e:
+                logger.warning("Skipping unreadable snapshot %s: %s", name, e,
+                               extra={'event': 'journal_snapshot_invalid'})
+        return {}, 0
+
+    def _replay(self, path: str, states: Dict[str, Dict[str, Any]]) -> int:
+        replayed = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    record = loads(line)
+                except Exception:
+                    logger.warning("Torn record at the end of %s; ignoring the rest", path,
+                                   extra={'event': 'journal_torn_record'})
+                    break
+                if record['op'] == 'set':
+                    apply_record(states, record)
+                elif record['op'] == 'del':
+                    states.pop(record['room'], None)
+                replayed += 1
+        return replayed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': True,
+            'segment': self._segment,
+            'segment_bytes': self._segment_size,
+            'pending_records': len(self._pending),
+            'records': self.records,
+            'flushes': self.flushes,
+            'snapshots': self.snapshots,
+            'recovered_rooms': self.recovered_rooms,
+            'recovery_ms': self.recovery_ms
+        }
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        # Flush what's left and wait for the journal thread to finish
+        if self._pending:
+            self._executor.submit(self._write, *self._take_pending())
+        self._executor.submit(self._close_file)
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+
+def create_room_journal(rooms: Dict[str, GameRoom]) -> RoomJournal:
+    """Build the journal for this process (a no-op one if journaling is disabled)."""
+    config = GAME_CONFIG['journal']
+    if not config['enabled']:
+        return RoomJournal(rooms)
+    path = config['path']
+    # Each worker of a multi-worker launch owns its own rooms, so its own journal
+    worker_index = os.environ.get(WORKER_INDEX_ENV)
+    if worker_index is not None:
+        path = os.path.join(path, f'worker-{worker_index}')
+    return FileRoomJournal(rooms, path)
@@ -0,0 +1,235 @@
+"""All-time leaderboards over the materialized `best_scores` table.
+
+`best_scores` holds every user's best score per game type, plus one row per
+user for their best across games (`OVERALL`). The write-behind queue upserts
+it in the same transaction as each batch of game results, so reading a
+leaderboard never touches the `game_scores` history.
+
+Entries are ranked by score, then by who reached it first (`reached_at`),
+then by user ID; `ix_best_scores_rank` has exactly that order.
+
+- Single worker: the table is loaded into memory once at startup and each
+  committed batch is applied to it, so a page is an O(log N + limit) slice
+  of a sorted list and a rank is an O(log N) lookup.
+- Several workers (the affinity launcher or clustered mode): each process
+  only sees its own batches, so the boards stay unused and pages and ranks
+  are indexed queries on `best_scores` (`query_page`, `query_rank`) that
+  every worker answers the same way.
+"""
+import os
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from server.cluster import REDIS_URL_ENV
+from server.database import OVERALL_GAME_TYPE, BestScore, User, db_executor
+from server.routing import WORKER_COUNT_ENV
+from server.utils.log import get_logger
+
+logger = get_logger('db')
+
+OVERALL = OVERALL_GAME_TYPE  # Board key for the across-games leaderboard
+MAX_PAGE_SIZE = 100
+
+RankKey = Tuple[int, datetime, int]  # (-score, reached_at, user_id)
+
+
+def _multi_process() -> bool:
+    return bool(os.environ.get(REDIS_URL_ENV)) or int(os.environ.get(WORKER_COUNT_ENV) or 1) > 1
+
+
+def _page_bounds(offset: int, limit: int) -> Tuple[int, int]:
+    return max(0, offset), max(1, min(limit, MAX_PAGE_SIZE))
+
+
+class Board:
+    """One leaderboard: each user's best score, kept in rank order."""
+
+    __slots__ = ('_keys', '_ranked')
+
+    def __init__(self):
+        self._keys: Dict[int, RankKey] = {}
+        self._ranked = SortedList()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def submit(self, user_id: int, score: int, reached_at: Optional[datetime]) -> None:
+        """Record a score; only an improvement on the user's best changes the board."""
+        old = self._keys.get(user_id)
+        if old is not None:
+            if score <= -old[0]:
+                return
+            self._ranked.remove(old)
+        key = (-score, reached_at or datetime.min, user_id)
+        self._keys[user_id] = key
+        self._ranked.add(key)
+
+    def best(self, user_id: int) -> Optional[Tuple[int, datetime]]:
+        key = self._keys.get(user_id)
+        return None if key is None else (-key[0], key[1])
+
+    def page(self, offset: int, limit: int) -> List[Tuple[int, int, datetime]]:
+        """`(user_id, score, reached_at)` ranked `offset` onwards, in O(log N + limit)."""
+        return [(user_id, -neg_score, reached_at)
+                for neg_score, reached_at, user_id in islice(self._ranked.islice(offset), limit)]
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """0-based rank of `user_id`, or None if they have no score."""
+        key = self._keys.get(user_id)
+        return None if key is None else self._ranked.index(key)
+
+
+def _entry(game_type: str, rank: int, username: Optional[str], score: int,
+           reached_at: Optional[datetime], games_played: int) -> Dict[str, Any]:
+    entry = {'rank': rank + 1, 'username': username}
+    if game_type == OVERALL:
+        entry['highest_score'] = score
+        entry['games_played'] = games_played
+    else:
+        entry['score'] = score
+        entry['played_at'] = reached_at
+    return entry
+
+
+class Leaderboards:
+    """In-memory copy of `best_scores`, one `Board` per game type and overall.
+
+    With `shared=True` (other processes write scores too) the boards are
+    never filled, and `fetch_page`/`fetch_rank` query the database instead.
+    """
+
+    def __init__(self, shared: bool = False):
+        self.shared = shared
+        self.boards: Dict[str, Board] = {}
+        self.games_played: Dict[int, int] = {}
+        self.usernames: Dict[int, str] = {}
+        self.user_ids: Dict[str, int] = {}
+
+    def load(self, db: Session) -> None:
+        """Fill the boards from `best_scores` (once, at startup)."""
+        for user_id, username, games_played in db.execute(select(User.id, User.username, User.games_played)):
+            self._name(user_id, username)
+            self.games_played[user_id] = games_played or 0
+        for game_type, user_id, score, reached_at in db.execute(
+                select(BestScore.game_type, BestScore.user_id, BestScore.score, BestScore.reached_at)):
+            self._board(game_type).submit(user_id, score, reached_at)
+        logger.info("Loaded leaderboards for %d users", len(self._board(OVERALL)),
+                    extra={'event': 'leaderboards_loaded'})
+
+    def _name(self, user_id: int, username: str) -> None:
+        self.usernames[user_id] = username
+        self.user_ids[username] = user_id
+
+    def _board(self, game_type: str) -> Board:
+        board = self.boards.get(game_type)
+        if board is None:
+            board = self.boards[game_type] = Board()
+        return board
+
+    def record_batch(self, scores: List[Dict[str, Any]], user_stats: List[Dict[str, int]],
+                     usernames: Dict[int, str]) -> None:
+        """Apply a committed write-behind batch (see `WriteBehindQueue.on_written`)."""
+        if self.shared:
+            return
+        for user_id, username in usernames.items():
+            self._name(user_id, username)
+        for row in scores:
+            self._board(row['game_type']).submit(row['user_id'], row['score'], row['played_at'])
+            self._board(OVERALL).submit(row['user_id'], row['score'], row['played_at'])
+        for stats in user_stats:
+            self.games_played[stats['b_id']] = self.games_played.get(stats['b_id'], 0) + stats['b_games']
+
+    def page(self, game_type: str, offset: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
+        """Entries ranked `offset + 1` onwards, at most `limit` (capped at MAX_PAGE_SIZE) of them."""
+        board = self.boards.get(game_type)
+        if board is None:
+            return []
+        offset, limit = _page_bounds(offset, limit)
+        return [_entry(game_type, offset + i, self.usernames.get(user_id), score, reached_at,
+                       self.games_played.get(user_id, 0))
+                for i, (user_id, score, reached_at) in enumerate(board.page(offset, limit))]
+
+    def rank(self, game_type: str, username: str) -> Optional[Dict[str, Any]]:
+        """`username`'s entry on a board, or None if they aren't on it."""
+        board = self.boards.get(game_type)
+        user_id = self.user_ids.get(username)
+        best = board.best(user_id) if board is not None and user_id is not None else None
+        if best is None:
+            return None
+        entry = _entry(game_type, board.rank(user_id), username, best[0], best[1],
+                       self.games_played.get(user_id, 0))
+        entry['total'] = len(board)
+        return entry
+
+    async def fetch_page(self, game_type: str, offset: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
+        """`page()`, read from the database when the boards are shared."""
+        if self.shared:
+            return await db_executor.run(partial(query_page, game_type=game_type, offset=offset, limit=limit))
+        return self.page(game_type, offset, limit)
+
+    async def fetch_rank(self, game_type: str, username: str) -> Optional[Dict[str, Any]]:
+        """`rank()`, read from the database when the boards are shared."""
+        if self.shared:
+            return await db_executor.run(partial(query_rank, game_type=game_type, username=username))
+        return self.rank(game_type, username)
+
+    def stats(self) -> Dict[str, Any]:
+        if self.shared:
+            return {'shared': True}
+        return {
+            'shared': False,
+            'boards': {game_type: len(board) for game_type, board in self.boards.items()},
+            'users': len(self.usernames)
+        }
+
+
+def query_page(db: Session, game_type: str, offset: int = 0, limit: int = 10) -> List[Dict[str, Any]]:
+    """`Leaderboards.page()` as one query on `ix_best_scores_rank`."""
+    offset, limit = _page_bounds(offset, limit)
+    rows = db.execute(
+        select(User.username, BestScore.score, BestScore.reached_at, User.games_played)
+        .join(User, User.id == BestScore.user_id)
+        .where(BestScore.game_type == game_type)
+        .order_by(BestScore.score.desc(), BestScore.reached_at, BestScore.user_id)
+        .offset(offset).limit(limit)
+    )
+    return [_entry(game_type, offset + i, username, score, reached_at, games_played or 0)
+            for i, (username, score, reached_at, games_played) in enumerate(rows)]
+
+
+def query_rank(db: Session, game_type: str, username: str) -> Optional[Dict[str, Any]]:
+    """`Leaderboards.rank()` read from `best_scores`."""
+    row = db.execute(
+        select(BestScore.user_id, BestScore.score, BestScore.reached_at, User.games_played)
+        .join(User, User.id == BestScore.user_id)
+        .where(User.username == username, BestScore.game_type == game_type)
+    ).first()
+    if row is None:
+        return None
+    user_id, score, reached_at, games_played = row
+    # Everyone ranked ahead: a higher score, the same score reached earlier, or a tie on both
+    ahead = db.execute(
+        select(func.count()).select_from(BestScore)
+        .where(BestScore.game_type == game_type, or_(
+            BestScore.score > score,
+            and_(BestScore.score == score, or_(
+                BestScore.reached_at < reached_at,
+                and_(BestScore.reached_at == reached_at, BestScore.user_id < user_id)
+            ))
+        ))
+    ).scalar()
+    total = db.execute(
+        select(func.count()).select_from(BestScore).where(BestScore.game_type == game_type)
+    ).scalar()
+    entry = _entry(game_type, ahead, username, score, reached_at, games_played or 0)
+    entry['total'] = total
+    return entry
+
+
+leaderboards = Leaderboards(shared=_multi_process())
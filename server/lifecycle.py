@@ -0,0 +1,170 @@
+"""Idle-room eviction and release of everything a room holds.
+
+Each room's deadline is its `last_activity_time` plus a TTL: `room_ttl.idle`
+while anyone is connected, the much shorter `room_ttl.empty` once nobody is
+(including rooms created by `/host` that nobody ever joined). Deadlines sit in
+a min-heap that is only added to, never searched: activity just moves
+`last_activity_time`, and when a stale entry comes up the real deadline is
+recomputed and the room re-armed. A sweep therefore costs O(expired log N).
+
+Connected players get a `room_expiring` warning shortly before teardown and
+`room_closed` when it happens. Closing a room runs every registered releaser
+(rate-limit buckets, timers, journal, directory, QR file, ...) and then
+`GameRoom.close()`, so nothing a room owned outlives it.
+"""
+import asyncio
+import heapq
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import socketio
+
+from server.config.game_config import GAME_CONFIG
+from server.models.game_room import GameRoom
+from server.utils.log import get_logger
+
+logger = get_logger('lifecycle')
+
+# Lifecycle events with no room yet
+ROOMLESS_EVENTS = ('connect',)
+
+
+class RoomLifecycle:
+    """Expiry heap over rooms' last activity, plus teardown hooks."""
+
+    def __init__(self, rooms: Dict[str, GameRoom], sid_rooms: Dict[str, str],
+                 idle_ttl: Optional[float] = None, empty_ttl: Optional[float] = None,
+                 warning: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        config = GAME_CONFIG['room_ttl']
+        self.rooms = rooms
+        self.sid_rooms = sid_rooms
+        self.idle_ttl = idle_ttl if idle_ttl is not None else config['idle']
+        self.empty_ttl = empty_ttl if empty_ttl is not None else config['empty']
+        self.warning = warning if warning is not None else config['warning']
+        self.clock = clock
+        self._heap: List[Tuple[float, str]] = []  # (when to look at the room, room_id)
+        self._armed: Dict[str, float] = {}  # room_id -> time of its live heap entry
+        self._warned: Dict[str, None] = {}
+        self._releasers: List[Callable[[str], Any]] = []
+        self.warned = 0
+        self.evicted = 0
+
+    def on_release(self, releaser: Callable[[str], Any]) -> None:
+        """Call `releaser(room_id)` (sync or async) whenever a room is closed."""
+        self._releasers.append(releaser)
+
+    def _deadline(self, room: GameRoom) -> float:
+        ttl = self.idle_ttl if room.connected_sids else self.empty_ttl
+        return room.last_activity_time + ttl
+
+    def _check_at(self, room: GameRoom) -> float:
+        # Connected players are warned first, so look at the room a bit early
+        deadline = self._deadline(room)
+        return deadline - self.warning if room.connected_sids else deadline
+
+    def _arm(self, room_id: str, when: float) -> None:
+        self._armed[room_id] = when
+        heapq.heappush(self._heap, (when, room_id))
+
+    def touch(self, room_id: Optional[str]) -> None:
+        """Record activity in a room (and start tracking it if it's new)."""
+        room = self.rooms.get(room_id) if room_id is not None else None
+        if room is None:
+            return
+        room.last_activity_time = self.clock()
+        self._warned.pop(room_id, None)
+        check_at = self._check_at(room)
+        armed = self._armed.get(room_id)
+        # A later time is picked up when the armed entry comes due; an earlier
+        # one (the room just emptied) needs its own entry
+        if armed is None or check_at < armed:
+            self._arm(room_id, check_at)
+
+    def expire(self) -> Tuple[List[Tuple[str, float]], List[str]]:
+        """Pop passed deadlines; returns ([(room_id, seconds_left)] to warn, [room_id] to close)."""
+        now = self.clock()
+        warn, close = [], []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            when, room_id = heapq.heappop(heap)
+            if self._armed.get(room_id) != when:
+                continue  # Superseded by an earlier entry
+            del self._armed[room_id]
+            room = self.rooms.get(room_id)
+            if room is None:
+                self._warned.pop(room_id, None)
+                continue
+
+            deadline = self._deadline(room)
+            if deadline <= now:
+                close.append(room_id)
+            elif room.connected_sids and now >= deadline - self.warning:
+                if room_id not in self._warned:
+                    self._warned[room_id] = None
+                    warn.append((room_id, deadline - now))
+                self._arm(room_id, deadline)
+            else:
+                self._arm(room_id, self._check_at(room))
+        return warn, close
+
+    async def sweep(self, sio: socketio.AsyncServer) -> None:
+        """Warn rooms that are about to expire and close the expired ones."""
+        warn, close = self.expire()
+        for room_id, seconds_left in warn:
+            self.warned += 1
+            await sio.emit('room_expiring', {'seconds_left': round(seconds_left)}, room=room_id)
+        for room_id in close:
+            room = self.rooms.get(room_id)
+            if room is not None and room.connected_sids:
+                await sio.emit('room_closed', {
+                    'message': 'This room was closed after a period of inactivity'
+                }, room=room_id)
+                await sio.close_room(room_id)
+            await self.close(room_id)
+
+    async def close(self, room_id: str) -> None:
+        """Remove a room now and release everything it holds."""
+        room = self.rooms.pop(room_id, None)
+        self._armed.pop(room_id, None)
+        self._warned.pop(room_id, None)
+        if room is None:
+            return
+        logger.info("Removing inactive room: %s", room_id, extra={'event': 'room_removed'})
+        self.evicted += 1
+        for sid in room.players:
+            if self.sid_rooms.get(sid) == room_id:
+                del self.sid_rooms[sid]
+
+        for releaser in self._releasers:
+            try:
+                result = releaser(room_id)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.warning("Error releasing room %s: %s", room_id, e,
+                               extra={'event': 'room_release_failed'})
+        room.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'rooms': len(self.rooms),
+            'tracked_rooms': len(self._armed),
+            'warned': self.warned,
+            'evicted': self.evicted
+        }
+
+    def install(self, sio: socketio.AsyncServer) -> None:
+        """Wrap every registered event handler so each event counts as room activity."""
+        handlers = sio.handlers['/']
+        for event, handler in list(handlers.items()):
+            if event not in ROOMLESS_EVENTS:
+                handlers[event] = self._tracked(handler)
+
+    def _tracked(self, handler):
+        async def tracked(sid, *args):
+            # Before and after: disconnect drops the sid's room, join_room sets it
+            room_id = self.sid_rooms.get(sid)
+            result = await handler(sid, *args)
+            self.touch(room_id or self.sid_rooms.get(sid))
+            return result
+        return tracked
@@ -2,28 +2,50 @@
 import random
 import time
 import io
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
+from itertools import islice
+from typing import Dict, Any, Deque, List, Optional, Tuple
 from PIL import Image, ImageDraw, ImageFont
 
-from server.config.game_config import GAME_CONFIG, GAME_TOPICS, MUSIC_CONFIG
-from server.config.questions import TRIVIA_QUESTIONS, CHASE_QUESTIONS
-from server.database import get_db, User, Achievement
+from server.config.game_config import GAME_CONFIG, MUSIC_CONFIG
+from server.config.questions import CHASE_QUESTIONS
+from server.database import result_writer
+from server.models.leaderboard import ScoreBoard
+from server.models.player import PlayerState
+from server.models.question_bank import TRIVIA_BANK, QuestionDecks
+from server.models.word_bank import WordDecks
+from server.utils.clock import Clock, get_clock
 
 class GameError(Exception):
     """Custom game error class for better error handling."""
     pass
 
+def name_key(name: str) -> str:
+    """Normalize a player name for uniqueness checks (case-insensitive)."""
+    return name.strip().casefold()
+
 class GameRoom:
-    def __init__(self, room_id: str):
+    def __init__(self, room_id: str, clock: Optional[Clock] = None):
         # Basic room attributes with enhanced security and profiles
         self.room_id = room_id
-        self.players: Dict[str, Dict[str, Any]] = {}  # {sid: {'name': str, 'user_id': int, 'profile_picture': str, 'is_host': bool, 'last_action': datetime, 'stats': Dict}}
+        self.clock = clock or get_clock()  # Every duration in the room is measured with this
+        self.players: Dict[str, PlayerState] = {}
+        # Insertion-ordered sid indexes over `players`, kept in step by
+        # add_player/remove_player/set_connected/rebind_player
+        self.connected_sids: Dict[str, None] = {}
+        self.player_sids: Dict[str, None] = {}  # Everyone except the host
+        self.active: Dict[str, None] = {}  # Connected non-host players
+        self.name_index: Dict[str, str] = {}  # name_key(name) -> sid, non-host players
         self.host_sid: Optional[str] = None
         self.game_state = 'waiting'
         self.current_game: Optional[str] = None
-        self.state_history: List[Dict[str, Any]] = []  # For state recovery
-        self.last_state_update = datetime.now()
+        self.state_version = 0  # Bumped on every committed state change
+        self.state_history: Deque[Dict[str, Any]] = deque(
+            maxlen=GAME_CONFIG['state_sync']['history_size']
+        )  # Recent deltas for state recovery
+        self._synced_state: Dict[str, Any] = {}  # Snapshot as of state_version
+        self.last_state_update = self.clock.now()
         
         # Player profiles and stats
         self.player_stats: Dict[str, Dict[str, Any]] = {}  # Persistent player statistics
@@ -37,7 +59,8 @@ class GameRoom:
         self.current_word: Optional[str] = None
         self.current_question = None
         self.topic: Optional[str] = None
-        self.round_start_time: Optional[datetime] = None
+        self.round_start_time: Optional[float] = None  # clock.now() reading
+        self.turn_start_time: Optional[float] = None  # clock.now() when the current turn or question began
         self.state_lock = False  # Prevent race conditions
         
         # Player management
@@ -46,21 +69,21 @@ class GameRoom:
         self.player_answers: Dict[str, Any] = {}
         self.player_streaks: Dict[str, int] = {}  # Track correct answer streaks
         self.player_skips: Dict[str, int] = {}  # Track consecutive skips
+        self.correct_answers: Dict[str, int] = {}  # Correct answers this game
         
         # Scoring system
-        self.scores: Dict[str, int] = {}
+        self.scores = ScoreBoard()
         self.round_scores: Dict[str, int] = {}
         self.perfect_rounds: Dict[str, int] = {}  # Track perfect rounds per player
         
         # Time management
-        self.round_start_time: Optional[datetime] = None
         self.timer_task = None
-        self.last_activity_time = datetime.now()
+        self.last_activity_time = self.clock.now()
         self.afk_warnings: Dict[str, bool] = {}  # Track AFK warnings per player
         
         # Enhanced content management
-        self.used_words = set()
-        self.used_questions = set()
+        self.word_decks = WordDecks()  # Drawing words dealt without repeats
+        self.question_decks = QuestionDecks(TRIVIA_BANK)  # Trivia questions dealt without repeats
         self.drawings: List[Dict[str, Any]] = []
         self.drawing_state = {
             'current_chain': [],  # Track drawing progression
@@ -84,17 +107,6 @@ class GameRoom:
             }
         }
         
-        # Performance optimization
-        self.cache = {
-            'leaderboard': None,
-            'leaderboard_timestamp': None,
-            'available_words': None,
-            'word_cache_round': None
-        }
-        
-        # Database connection
-        self.db = next(get_db())
-        
         # Enhanced chase game attributes
         self.chaser: Optional[str] = None
         self.chase_category: Optional[str] = None
@@ -122,14 +134,190 @@ class GameRoom:
         self.current_music: Optional[str] = 'lobby'
         self.music_fade_task = None
 
+    def close(self) -> None:
+        """Release what the room holds once it has been removed."""
+        if self.music_fade_task is not None:
+            self.music_fade_task.cancel()
+            self.music_fade_task = None
+        self.timer_task = None
+        # Cached media can be large (profile pictures, drawings)
+        self.profile_cache.clear()
+        self.drawings = []
+        self.drawing_state['canvas_history'] = []
+
+    @property
+    def scores(self) -> ScoreBoard:
+        """Scores by sid, kept in rank order (see `ScoreBoard`)."""
+        return self._scores
+
+    @scores.setter
+    def scores(self, value: Dict[str, int]) -> None:
+        self._scores = value if isinstance(value, ScoreBoard) else ScoreBoard(value)
+
+    def get_state_snapshot(self) -> Dict[str, Any]:
+        """Build the client-visible room state (no answers or hidden words)."""
+        question = None
+        if self.current_game == 'trivia' and self.current_question:
+            question = {
+                'question': self.current_question['question'],
+                'options': self.current_question['options'],
+                'category': self.current_question.get('category')
+            }
+
+        current_player = None
+        if self.current_game == 'chinese_whispers' and self.player_order:
+            drawer_sid = self.player_order[self.current_player_index % len(self.player_order)]
+            if drawer_sid in self.players:
+                current_player = self.players[drawer_sid].name
+
+        chase = None
+        if self.current_game == 'chase':
+            chase = {
+                'chaser': self.players[self.chaser].name if self.chaser in self.players else None,
+                'category': self.chase_category,
+                'chaser_position': self.chase_state['chaser_position'],
+                'contestant_position': self.chase_state['contestant_position']
+            }
+
+        return {
+            'game_state': self.game_state,
+            'current_game': self.current_game,
+            'round': self.round,
+            'total_rounds': self.total_rounds,
+            'players': [player.summary() for player in self.active_players()],
+            'scores': self.public_scores(),
+            'question': question,
+            'current_player': current_player,
+            'chase': chase
+        }
+
+    def public_scores(self) -> Dict[str, int]:
+        """Scores keyed by player name, for clients (sids must stay private)."""
+        return {self.players[sid].name: score for sid, score in self.scores.ranked() if sid in self.players}
+
+    def public_achievements(self) -> Dict[str, List[str]]:
+        """Achievements keyed by player name, like `public_scores`."""
+        return {self.players[sid].name: names for sid, names in self.achievements.items() if sid in self.players}
+
+    def commit_state(self) -> Optional[Dict[str, Any]]:
+        """Record what changed since the last commit as a new versioned delta.
+
+        Returns the delta, or None if nothing client-visible changed.
+        """
+        snapshot = self.get_state_snapshot()
+        changes = {
+            key: value for key, value in snapshot.items()
+            if key not in self._synced_state or self._synced_state[key] != value
+        }
+        if not changes:
+            return None
+
+        self._synced_state = snapshot
+        self.state_version += 1
+        delta = {'version': self.state_version, 'changes': changes}
+        self.state_history.append(delta)
+        self.last_state_update = self.clock.now()
+        return delta
+
+    def get_state_since(self, version: Optional[int]) -> Dict[str, Any]:
+        """Get the deltas after `version`, or a full snapshot if they are gone."""
+        oldest = self.state_history[0]['version'] if self.state_history else self.state_version + 1
+        if version is not None and oldest - 1 <= version <= self.state_version:
+            # Versions in the history are contiguous, so skip straight to the first newer one
+            return {
+                'type': 'delta',
+                'version': self.state_version,
+                'deltas': list(islice(self.state_history, version - oldest + 1, None))
+            }
+        return {
+            'type': 'snapshot',
+            'version': self.state_version,
+            'state': self.get_state_snapshot()
+        }
+
+    # Room attributes written to the crash-recovery journal (see server/journal.py)
+    DURABLE_FIELDS = (
+        'host_sid', 'game_state', 'current_game', 'round', 'total_rounds',
+        'difficulty_level', 'topic', 'current_word', 'current_question',
+        'player_order', 'current_player_index', 'player_answers', 'player_streaks', 'correct_answers',
+        'perfect_rounds', 'achievements', 'chaser', 'chase_category', 'chase_contestant',
+        'chase_questions', 'chase_state', 'state_version'
+    )
+    # Per-player tables in the durable state, journaled entry by entry
+    DURABLE_TABLES = (
+        'players', 'scores', 'player_answers', 'player_streaks', 'correct_answers', 'perfect_rounds',
+        'achievements'
+    )
+
+    def get_durable_state(self) -> Dict[str, Any]:
+        """Everything needed to rebuild the room in a new process.
+
+        Sockets, timers, decks and drawings (large images) are left out.
+        """
+        state = {field: getattr(self, field) for field in self.DURABLE_FIELDS}
+        state['players'] = {
+            sid: {'name': player.name, 'is_host': player.is_host, 'user_id': player.user_id,
+                  'reconnect_token': player.reconnect_token}
+            for sid, player in self.players.items()
+        }
+        state['scores'] = dict(self.scores)
+        return state
+
+    @classmethod
+    def from_durable_state(cls, room_id: str, state: Dict[str, Any],
+                           clock: Optional[Clock] = None) -> 'GameRoom':
+        """Rebuild a room from `get_durable_state()` output.
+
+        Every seat comes back disconnected; players reattach with
+        `recover_state` (or by rejoining under the same name).
+        """
+        room = cls(room_id, clock)
+        for field in cls.DURABLE_FIELDS:
+            if field in state:
+                setattr(room, field, state[field])
+        for sid, seat in state.get('players', {}).items():
+            player = room.add_player(sid, seat['name'], is_host=seat['is_host'], user_id=seat['user_id'])
+            if seat.get('reconnect_token'):
+                player.reconnect_token = seat['reconnect_token']
+            room.set_connected(sid, False)
+        room.scores = state.get('scores', {})
+        if room.game_state == 'playing':
+            # Round timing isn't journaled; the round restarts from now
+            room.round_start_time = room.clock.now()
+        return room
+
+    def rebind_player(self, old_sid: str, new_sid: str) -> None:
+        """Move a reconnecting player's state from their old sid to a new one."""
+        player = self.remove_player(old_sid)
+        self.players[new_sid] = player
+        if not player.is_host:
+            self.player_sids[new_sid] = None
+            self.name_index[name_key(player.name)] = new_sid
+        self.set_connected(new_sid, True)
+
+        self.scores.rebind(old_sid, new_sid)
+        for table in (self.round_scores, self.player_answers, self.player_streaks,
+                      self.player_skips, self.correct_answers, self.perfect_rounds, self.afk_warnings,
+                      self.profile_cache, self.player_stats, self.achievements):
+            if old_sid in table:
+                table[new_sid] = table.pop(old_sid)
+
+        self.player_order = [new_sid if pid == old_sid else pid for pid in self.player_order]
+        if self.host_sid == old_sid:
+            self.host_sid = new_sid
+        if self.chaser == old_sid:
+            self.chaser = new_sid
+        if self.chase_contestant == old_sid:
+            self.chase_contestant = new_sid
+
     def reset_round(self) -> None:
         """Reset the round state with enhanced cleanup."""
         self.drawings = []
         self.current_word = None
         self.player_answers = {}
         self.round_scores = {}
-        self.round_start_time = datetime.now()
-        self.last_activity_time = datetime.now()
+        self.round_start_time = self.clock.now()
+        self.last_activity_time = self.clock.now()
         
         # Clear AFK warnings at round start
         self.afk_warnings = {sid: False for sid in self.players}
@@ -143,127 +331,101 @@ class GameRoom:
         else:
             self.difficulty_level = 'hard'
             
-        # Clear performance caches
-        self.cache['leaderboard'] = None
-        self.cache['available_words'] = None
-        self.cache['word_cache_round'] = None
+        # Rank movement on the leaderboard is measured from the start of the round
+        self.scores.mark_ranks()
 
     def get_next_word(self) -> str:
         """Get the next word with progressive difficulty."""
-        # Check cache first
-        if (self.cache['available_words'] is not None and 
-            self.cache['word_cache_round'] == self.round):
-            available_words = self.cache['available_words']
-        else:
-            available_words = []
-            # Get words based on current difficulty
-            for topic_words in GAME_TOPICS.values():
-                words = topic_words[self.difficulty_level]
-                available_words.extend([w for w in words if w not in self.used_words])
-                
-            # If no words available in current difficulty, include easier ones
-            if not available_words and self.difficulty_level != 'easy':
-                if self.difficulty_level == 'hard':
-                    # Try medium words
-                    for topic_words in GAME_TOPICS.values():
-                        words = topic_words['medium']
-                        available_words.extend([w for w in words if w not in self.used_words])
-                
-                # If still no words, try easy words
-                if not available_words:
-                    for topic_words in GAME_TOPICS.values():
-                        words = topic_words['easy']
-                        available_words.extend([w for w in words if w not in self.used_words])
-            
-            # If still no words, reset used words
-            if not available_words:
-                self.used_words.clear()
-                for topic_words in GAME_TOPICS.values():
-                    words = topic_words[self.difficulty_level]
-                    available_words.extend(words)
-            
-            # Update cache
-            self.cache['available_words'] = available_words
-            self.cache['word_cache_round'] = self.round
-        
-        word = random.choice(available_words)
-        self.used_words.add(word)
-        
-        # Update cache
-        self.cache['available_words'] = [w for w in available_words if w != word]
-        return word
+        return self.word_decks.draw(self.difficulty_level)
 
     def get_next_question(self) -> Dict[str, Any]:
         """Get the next question for trivia game."""
-        # Track questions by their text to avoid unhashable dict issue
-        used_questions = {q['question'] for q in TRIVIA_QUESTIONS if q['question'] in self.used_questions}
-        
-        # Filter questions by current difficulty level
-        difficulty_map = {'easy': 1, 'medium': 2, 'hard': 3}
-        current_difficulty = difficulty_map[self.difficulty_level]
-        available_questions = [q for q in TRIVIA_QUESTIONS 
-                             if q['question'] not in used_questions and 
-                             q['difficulty'] == current_difficulty]
-        
-        if not available_questions:
-            # If no questions at current difficulty, try easier ones
-            if current_difficulty > 1:
-                available_questions = [q for q in TRIVIA_QUESTIONS 
-                                    if q['question'] not in used_questions and 
-                                    q['difficulty'] < current_difficulty]
-            
-            # If still no questions, reset used questions
-            if not available_questions:
-                self.used_questions.clear()
-                available_questions = [q for q in TRIVIA_QUESTIONS 
-                                    if q['difficulty'] == current_difficulty]
-        
-        question = random.choice(available_questions)
-        self.used_questions.add(question['question'])
-        self.round_start_time = datetime.now()  # Reset timer for new question
+        question = self.question_decks.draw(self.difficulty_level)
+        self.round_start_time = self.clock.now()  # Reset timer for new question
         return question
 
-    def add_player(self, sid: str, name: str, profile_picture: str = None, is_host: bool = False) -> None:
-        """Add a player with profile picture and initialize their stats."""
-        # Initialize player stats
-        initial_stats = {
-            'games_played': 0,
-            'wins': 0,
-            'perfect_rounds': 0,
-            'total_score': 0,
-            'best_streak': 0,
-            'favorite_game': None,
-            'achievements': [],
-            'last_played': datetime.now()
-        }
+    def add_player(self, sid: str, name: str, profile_picture: Optional[str] = None,
+                   is_host: bool = False, user_id: Optional[int] = None) -> PlayerState:
+        """Seat a connected player and initialize their stats."""
+        player = PlayerState(
+            name=name,
+            last_action=self.clock.now(),
+            is_host=is_host,
+            user_id=user_id,
+            profile_picture=profile_picture or '',
+            stats={
+                'games_played': 0,
+                'wins': 0,
+                'perfect_rounds': 0,
+                'total_score': 0,
+                'best_streak': 0,
+                'favorite_game': None,
+                'achievements': [],
+                'last_played': datetime.now()
+            }
+        )
 
-        # Process profile picture
+        # Cache the profile picture; a default one is generated on first use
         if profile_picture:
-            # Cache the profile picture
             self.profile_cache[sid] = profile_picture
-        else:
-            # Generate default profile picture if none provided
-            self.profile_cache[sid] = self._generate_default_profile(name[0].upper())
-
-        # Add player to room
-        self.players[sid] = {
-            'name': name,
-            'profile_picture': self.profile_cache[sid],
-            'is_host': is_host,
-            'last_action': datetime.now(),
-            'stats': initial_stats.copy()
-        }
 
         # Load persistent stats if available
         if sid in self.player_stats:
-            self.players[sid]['stats'].update(self.player_stats[sid])
+            player.stats.update(self.player_stats[sid])
+
+        self.players[sid] = player
+        self.connected_sids[sid] = None
+        if not is_host:
+            self.player_sids[sid] = None
+            self.active[sid] = None
+            self.name_index[name_key(name)] = sid
+        return player
+
+    def remove_player(self, sid: str) -> Optional[PlayerState]:
+        """Drop a seat entirely (not just disconnect it)."""
+        self.connected_sids.pop(sid, None)
+        self.player_sids.pop(sid, None)
+        self.active.pop(sid, None)
+        player = self.players.pop(sid, None)
+        if player is not None and self.name_index.get(name_key(player.name)) == sid:
+            del self.name_index[name_key(player.name)]
+        return player
+
+    def find_player(self, name: str) -> Optional[str]:
+        """Sid of the non-host player using `name` (case-insensitive), if any."""
+        return self.name_index.get(name_key(name))
+
+    def set_connected(self, sid: str, connected: bool) -> None:
+        """Mark a player connected or disconnected, keeping the index in step."""
+        self.players[sid].connected = connected
+        if connected:
+            self.connected_sids[sid] = None
+            if sid in self.player_sids:
+                self.active[sid] = None
+        else:
+            self.connected_sids.pop(sid, None)
+            self.active.pop(sid, None)
+
+    @property
+    def active_count(self) -> int:
+        """Number of connected non-host players."""
+        return len(self.active)
+
+    def active_players(self) -> List[PlayerState]:
+        """Connected non-host players, in join order."""
+        players = self.players
+        return [players[sid] for sid in self.active]
+
+    def active_sids(self) -> List[str]:
+        """Sids of connected non-host players, in join order."""
+        return list(self.active)
 
     def update_player_stats(self, sid: str, game_result: Dict[str, Any]) -> None:
         """Update player statistics after a game."""
         if sid not in self.players:
             return
 
-        stats = self.players[sid]['stats']
+        stats = self.players[sid].stats
         stats['games_played'] += 1
         stats['total_score'] += game_result.get('score', 0)
         
@@ -298,10 +460,14 @@ class GameRoom:
             return None
 
         player = self.players[sid]
+        if not player.profile_picture:
+            if sid not in self.profile_cache:
+                self.profile_cache[sid] = self._generate_default_profile(player.name[0].upper())
+            player.profile_picture = self.profile_cache[sid]
         return {
-            'name': player['name'],
-            'profile_picture': player['profile_picture'],
-            'stats': player['stats'],
+            'name': player.name,
+            'profile_picture': player.profile_picture,
+            'stats': player.stats,
             'achievements': self.achievements.get(sid, []),
             'rank': self._calculate_player_rank(sid)
         }
@@ -311,7 +477,7 @@ class GameRoom:
         if sid not in self.players:
             return 'Novice'
 
-        stats = self.players[sid]['stats']
+        stats = self.players[sid].stats
         score = (
             stats['wins'] * 100 +
             stats['perfect_rounds'] * 50 +
@@ -390,7 +556,7 @@ class GameRoom:
         }
         
         # Update activity timestamp
-        self.last_activity_time = datetime.now()
+        self.last_activity_time = self.clock.now()
         self.afk_warnings[player_id] = False
         
         if is_correct:
@@ -415,6 +581,7 @@ class GameRoom:
             
             # Reset skip counter on correct answer
             self.player_skips[player_id] = 0
+            self.correct_answers[player_id] = self.correct_answers.get(player_id, 0) + 1
             
         else:
             # Reset streak on wrong answer
@@ -436,9 +603,8 @@ class GameRoom:
                 result['participation_bonus'] = 0
         
         # Comeback bonus for trailing players
-        leaderboard = self.get_leaderboard()
-        if len(leaderboard) > 1:
-            max_score = leaderboard[0]['score']
+        if len(self.scores) > 1:
+            max_score = self.scores.max_score()
             player_score = self.scores.get(player_id, 0)
             if player_score < max_score * 0.5:  # Significantly behind
                 result['comeback_bonus'] = GAME_CONFIG['points']['comeback_bonus']
@@ -458,39 +624,29 @@ class GameRoom:
         
         return result
 
-    def get_leaderboard(self) -> List[Dict[str, Any]]:
-        """Get cached leaderboard with enhanced player stats."""
-        current_time = datetime.now()
-        if (self.cache['leaderboard'] is None or
-            self.cache['leaderboard_timestamp'] is None or
-            (current_time - self.cache['leaderboard_timestamp']).seconds > 2):
-            
-            leaderboard = []
-            for pid, score in self.scores.items():
-                if not self.players[pid].get('is_host', False):
-                    player_data = {
-                        'name': self.players[pid]['name'],
-                        'score': score,
-                        'streak': self.player_streaks.get(pid, 0),
-                        'perfect_rounds': self.perfect_rounds.get(pid, 0),
-                        'rank_change': 0  # Will be calculated below
-                    }
-                    leaderboard.append(player_data)
-            
-            # Sort by score
-            leaderboard.sort(key=lambda x: x['score'], reverse=True)
-            
-            # Calculate rank changes if we have previous leaderboard
-            if self.cache['leaderboard']:
-                old_ranks = {player['name']: idx for idx, player in enumerate(self.cache['leaderboard'])}
-                for idx, player in enumerate(leaderboard):
-                    if player['name'] in old_ranks:
-                        player['rank_change'] = old_ranks[player['name']] - idx
-            
-            self.cache['leaderboard'] = leaderboard
-            self.cache['leaderboard_timestamp'] = current_time
-        
-        return self.cache['leaderboard']
+    def get_leaderboard(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get the ranked leaderboard (top `limit` players) with player stats.
+
+        Ranks are maintained incrementally by `self.scores`, so this only
+        walks the entries it returns.
+        """
+        ranked = self.scores.ranked()
+        if limit is not None:
+            ranked = islice(ranked, limit)
+
+        leaderboard = []
+        for rank, (pid, score) in enumerate(ranked):
+            player = self.players.get(pid)
+            if player is None:
+                continue
+            leaderboard.append({
+                'name': player.name,
+                'score': score,
+                'streak': self.player_streaks.get(pid, 0),
+                'perfect_rounds': self.perfect_rounds.get(pid, 0),
+                'rank_change': self.scores.rank_change(pid, rank)
+            })
+        return leaderboard
 
     def update_difficulty(self) -> None:
         """Update game difficulty based on player performance."""
@@ -508,7 +664,7 @@ class GameRoom:
         """Shuffle player order with catch-up mechanic for trailing players."""
         # Sort players by score
         sorted_players = sorted(
-            [(pid, self.scores.get(pid, 0)) for pid in self.players if not self.players[pid].get('is_host', False)],
+            [(pid, self.scores.get(pid, 0)) for pid in self.player_sids],
             key=lambda x: x[1]
         )
         
@@ -573,33 +729,34 @@ class GameRoom:
 
     def award_end_game_achievements(self) -> None:
         """Award achievements at the end of the game."""
-        leaderboard = self.get_leaderboard()
+        leaderboard = self.get_leaderboard(limit=1)
         if leaderboard:
             # Award winner achievement
             winner = leaderboard[0]
             winner_id = next(
-                pid for pid, data in self.players.items()
-                if data['name'] == winner['name']
+                pid for pid, player in self.players.items()
+                if player.name == winner['name']
             )
-            user = self.db.query(User).filter_by(id=self.players[winner_id]['user_id']).first()
-            if user:
-                achievement = Achievement(
-                    user_id=user.id,
-                    name='game_winner',
-                    description=f'Won a game with {winner["score"]} points!'
-                )
-                self.db.add(achievement)
-                
-                # Perfect game achievement
-                if self.perfect_rounds.get(winner_id, 0) == self.total_rounds:
-                    achievement = Achievement(
-                        user_id=user.id,
-                        name='perfect_game',
-                        description='Completed a game with all perfect rounds!'
-                    )
-                    self.db.add(achievement)
-                
-                self.db.commit()
+            user_id = self.players[winner_id].user_id
+            if user_id is None:
+                return
+            # Queued and written in a later batch; the game doesn't wait for the database
+            result_writer.add_achievement(user_id, 'game_winner', f'Won a game with {winner["score"]} points!')
+
+            # Perfect game achievement
+            if self.perfect_rounds.get(winner_id, 0) == self.total_rounds:
+                result_writer.add_achievement(user_id, 'perfect_game', 'Completed a game with all perfect rounds!')
+
+    def record_game_results(self) -> None:
+        """Queue every signed-in player's score, stats and achievements for the finished game."""
+        for sid, score in dict(self.scores).items():
+            player = self.players.get(sid)
+            if player is None or player.user_id is None:
+                continue
+            result_writer.add_score(player.user_id, self.current_game, score,
+                                    self.correct_answers.get(sid, 0), self.total_rounds)
+            result_writer.add_game_played(player.user_id, score)
+        self.award_end_game_achievements()
 
     def change_music(self, music_type: str, fade: bool = False) -> None:
         """Change background music with optional fade effect."""
@@ -631,7 +788,7 @@ class GameRoom:
         }
         self.chase_contestant = None
         self.chase_questions = []
-        self.round_start_time = datetime.now()
+        self.round_start_time = self.clock.now()
 
         # Select questions for this chase game
         available_questions = CHASE_QUESTIONS[category]
@@ -652,7 +809,7 @@ class GameRoom:
 
         self.chase_contestant = contestant_sid
         self.game_state = 'chase_question'
-        self.round_start_time = datetime.now()
+        self.round_start_time = self.clock.now()
 
         # Set starting positions based on offer type
         if offer_type == 'high':
@@ -731,7 +888,7 @@ class GameRoom:
             self.chase_questions.pop(0)
             if self.chase_questions:
                 result['next_question'] = self.chase_questions[0]
-                self.round_start_time = datetime.now()  # Reset timer for next question
+                self.round_start_time = self.clock.now()  # Reset timer for next question
             else:
                 result['game_over'] = True
                 result['winner'] = 'contestant'
@@ -776,7 +933,7 @@ class GameRoom:
             self.game_state = 'waiting'
 
         # Check for active players
-        active_players = sum(1 for p in self.players.values() if p.get('connected', False) and not p.get('is_host', False))
+        active_players = self.active_count
         min_players = GAME_CONFIG['game_modes'].get(self.current_game, {}).get('min_players', 2)
 
         # Reset game if not enough players
@@ -795,7 +952,7 @@ class GameRoom:
             self.current_game = None
             
         # Validate player states
-        for pid in list(self.players.keys()):
+        for pid in self.player_sids:
             if pid not in self.scores:
                 self.scores[pid] = 0
             if pid not in self.player_streaks:
@@ -805,17 +962,39 @@ class GameRoom:
             if pid not in self.perfect_rounds:
                 self.perfect_rounds[pid] = 0
 
+    def awaiting_action(self, sid: str) -> bool:
+        """Whether the game is waiting on `sid` to act right now."""
+        if self.game_state != 'playing' or self.state_lock:
+            return False
+        if self.current_game == 'trivia':
+            return sid not in self.player_answers
+        if self.current_game == 'chinese_whispers':
+            if not self.player_order:
+                return False
+            return self.player_order[self.current_player_index % len(self.player_order)] == sid
+        return True
+
+    def mark_all_active(self, now: float) -> None:
+        """Restart every player's idle clock (time spent in the lobby is not AFK)."""
+        for player in self.players.values():
+            player.last_action = now
+        self.afk_warnings = {sid: False for sid in self.players}
+
     def check_afk_players(self) -> List[str]:
-        """Check for AFK players and return list of inactive players."""
-        current_time = datetime.now()
+        """Flag players idle for longer than `idle_timeout` and return the newly flagged.
+
+        This scans the whole room; the server itself detects AFK players with
+        `server.sockets.afk.AfkTracker`, which only visits expired players.
+        """
+        now = self.clock.now()
         afk_players = []
-        
-        for pid in self.players:
-            if (current_time - self.last_activity_time).seconds > GAME_CONFIG['idle_timeout']:
+
+        for pid in self.active_sids():
+            if now - self.players[pid].last_action > GAME_CONFIG['idle_timeout']:
                 if not self.afk_warnings.get(pid, False):
                     self.afk_warnings[pid] = True
                     afk_players.append(pid)
-                    
+
         return afk_players
 
     def validate_game_action(self, player_sid: str, action_type: str) -> None:
@@ -833,7 +1012,7 @@ class GameRoom:
             raise GameError("Game is currently paused")
             
         # Update activity timestamp
-        self.last_activity_time = datetime.now()
+        self.last_activity_time = self.clock.now()
         self.afk_warnings[player_sid] = False
 
     def is_round_complete(self) -> bool:
@@ -843,16 +1022,17 @@ class GameRoom:
         
         if self.current_game == 'chinese_whispers':
             all_drawn = len(self.drawings) >= len(self.players)
+            now = self.clock.now()
             all_active = all(
-                (datetime.now() - self.last_activity_time).seconds < GAME_CONFIG['idle_timeout']
-                for pid in self.players
+                now - self.players[pid].last_action < GAME_CONFIG['idle_timeout']
+                for pid in self.active_sids()
             )
             return all_drawn or not all_active
         else:  # trivia
             all_answered = len(self.player_answers) >= len(self.players)
             time_limit_reached = (
-                self.round_start_time and 
-                (datetime.now() - self.round_start_time).seconds >= GAME_CONFIG['trivia_time']
+                self.round_start_time is not None and
+                self.clock.elapsed(self.round_start_time) >= GAME_CONFIG['trivia_time']
             )
             return all_answered or time_limit_reached
 
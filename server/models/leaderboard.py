@@ -0,0 +1,116 @@
+"""Score table that keeps players ranked as scores change."""
+from itertools import count, islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+
+_MISSING = object()
+
+
+class ScoreBoard(dict):
+    """A `{sid: score}` dict that also keeps its entries in rank order.
+
+    Every write re-files just the one entry in a sorted list, so updates are
+    O(log N), the top score is an O(1) read and the top k are an O(k) walk;
+    nothing is re-sorted. Ties keep the order in which players first scored.
+
+    Rank changes are measured against a baseline captured with `mark_ranks()`
+    (once per round), so they are exact rather than tied to when a cached
+    leaderboard happened to be rebuilt.
+    """
+
+    def __init__(self, scores: Optional[Dict[str, int]] = None):
+        super().__init__()
+        self._ranked = SortedList()  # (-score, seq, sid)
+        self._seq: Dict[str, int] = {}
+        self._counter = count()
+        self._baseline: Dict[str, int] = {}  # sid -> rank at the last mark_ranks()
+        if scores:
+            self.update(scores)
+
+    def _entry(self, sid: str) -> Tuple[int, int, str]:
+        return (-dict.__getitem__(self, sid), self._seq[sid], sid)
+
+    def __setitem__(self, sid: str, score: int) -> None:
+        if sid in self:
+            self._ranked.remove(self._entry(sid))
+        else:
+            self._seq[sid] = next(self._counter)
+        dict.__setitem__(self, sid, score)
+        self._ranked.add(self._entry(sid))
+
+    def __delitem__(self, sid: str) -> None:
+        self._ranked.remove(self._entry(sid))
+        dict.__delitem__(self, sid)
+        del self._seq[sid]
+        self._baseline.pop(sid, None)
+
+    def pop(self, sid: str, default=_MISSING):
+        if sid not in self:
+            if default is _MISSING:
+                raise KeyError(sid)
+            return default
+        score = dict.__getitem__(self, sid)
+        del self[sid]
+        return score
+
+    def setdefault(self, sid: str, default: int = 0) -> int:
+        if sid not in self:
+            self[sid] = default
+        return dict.__getitem__(self, sid)
+
+    def update(self, other=(), **kwargs) -> None:
+        items = other.items() if hasattr(other, 'items') else other
+        for sid, score in items:
+            self[sid] = score
+        for sid, score in kwargs.items():
+            self[sid] = score
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self._ranked.clear()
+        self._seq.clear()
+        self._baseline.clear()
+
+    def copy(self) -> Dict[str, int]:
+        return dict(self)
+
+    def rebind(self, old_sid: str, new_sid: str) -> None:
+        """Move a score to a new sid, keeping its tie order and rank baseline."""
+        if old_sid not in self:
+            return
+        score, seq = dict.__getitem__(self, old_sid), self._seq[old_sid]
+        baseline = self._baseline.get(old_sid)
+        del self[old_sid]
+        self._seq[new_sid] = seq
+        dict.__setitem__(self, new_sid, score)
+        self._ranked.add(self._entry(new_sid))
+        if baseline is not None:
+            self._baseline[new_sid] = baseline
+
+    def max_score(self) -> int:
+        """Highest score, or 0 when nobody has scored."""
+        return -self._ranked[0][0] if self._ranked else 0
+
+    def ranked(self) -> Iterator[Tuple[str, int]]:
+        """`(sid, score)` pairs from highest to lowest score."""
+        for neg_score, _, sid in self._ranked:
+            yield sid, -neg_score
+
+    def top(self, k: int) -> List[Tuple[str, int]]:
+        return list(islice(self.ranked(), k))
+
+    def rank(self, sid: str) -> Optional[int]:
+        """0-based rank of `sid`, or None if it has no score."""
+        if sid not in self:
+            return None
+        return self._ranked.index(self._entry(sid))
+
+    def mark_ranks(self) -> None:
+        """Record the current ranks as the baseline for `rank_change`."""
+        self._baseline = {sid: idx for idx, (_, _, sid) in enumerate(self._ranked)}
+
+    def rank_change(self, sid: str, rank: int) -> int:
+        """Places gained (positive) or lost since the last `mark_ranks()`."""
+        baseline = self._baseline.get(sid)
+        return 0 if baseline is None else baseline - rank
@@ -0,0 +1,30 @@
+"""Per-player state held by a game room."""
+import secrets
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+
+@dataclass(slots=True)
+class PlayerState:
+    """One seat in a room.
+
+    `connected` is indexed by the room (`GameRoom.connected_sids`); change it
+    through `GameRoom.set_connected` rather than assigning it directly.
+    `last_action` is a `time.monotonic()` timestamp of the player's last
+    socket event, used for AFK detection. `reconnect_token` is a secret that
+    only the seat's owner is given; `recover_state` requires it.
+    """
+    name: str
+    is_host: bool = False
+    connected: bool = True
+    user_id: Optional[int] = None
+    profile_picture: str = ''
+    score: int = 0
+    last_action: float = field(default_factory=time.monotonic)
+    stats: Dict[str, Any] = field(default_factory=dict)
+    reconnect_token: str = field(default_factory=lambda: secrets.token_urlsafe(24))
+
+    def summary(self) -> Dict[str, Any]:
+        """Public view used in player lists."""
+        return {'name': self.name, 'score': self.score}
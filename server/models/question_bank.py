@@ -0,0 +1,121 @@
+"""Indexed trivia question bank and per-room shuffled decks."""
+import random
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from server.config.questions import TRIVIA_QUESTIONS
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+DEFAULT_DIFFICULTY = 'easy'  # For questions that don't declare one
+
+# Question banks use both the names and 1-3
+_DIFFICULTY_ALIASES = {
+    'easy': 'easy', 'medium': 'medium', 'hard': 'hard',
+    1: 'easy', 2: 'medium', 3: 'hard'
+}
+
+
+def normalize_difficulty(value: Any) -> str:
+    if isinstance(value, str):
+        value = value.lower()
+    return _DIFFICULTY_ALIASES.get(value, DEFAULT_DIFFICULTY)
+
+
+class QuestionBank:
+    """Questions compiled once into ID-indexed tiers.
+
+    Each question gets a stable integer ID (its position in the source list)
+    and is indexed by difficulty and by (category, difficulty).
+    """
+
+    def __init__(self, questions: Sequence[Dict[str, Any]]):
+        self.questions: List[Dict[str, Any]] = []
+        by_difficulty: Dict[str, List[int]] = {d: [] for d in DIFFICULTIES}
+        by_category: Dict[Tuple[str, str], List[int]] = {}
+        for qid, question in enumerate(questions):
+            difficulty = normalize_difficulty(question.get('difficulty'))
+            self.questions.append(dict(question, id=qid, difficulty=difficulty))
+            by_difficulty[difficulty].append(qid)
+            category = question.get('category')
+            if category:
+                by_category.setdefault((category, difficulty), []).append(qid)
+
+        self.by_difficulty = {d: tuple(ids) for d, ids in by_difficulty.items()}
+        self.by_category = {key: tuple(ids) for key, ids in by_category.items()}
+        self.categories = tuple(sorted({category for category, _ in by_category}))
+
+    def ids(self, difficulty: str, category: Optional[str] = None) -> Tuple[int, ...]:
+        if category is None:
+            return self.by_difficulty.get(difficulty, ())
+        return self.by_category.get((category, difficulty), ())
+
+
+class Deck:
+    """Cards (question IDs, words) dealt in random order without repeats.
+
+    Shuffling is lazy (an incremental Fisher-Yates): each draw swaps one
+    random remaining card to the end, so a draw is O(1) and nothing is
+    shuffled up front. `reset` makes every card drawable again.
+    """
+
+    __slots__ = ('cards', 'remaining')
+
+    def __init__(self, cards: Sequence[Any]):
+        self.cards = list(cards)
+        self.remaining = len(self.cards)
+
+    def draw(self, rng: random.Random) -> Optional[Any]:
+        if not self.remaining:
+            return None
+        last = self.remaining - 1
+        pick = rng.randrange(self.remaining)
+        cards = self.cards
+        cards[pick], cards[last] = cards[last], cards[pick]
+        self.remaining = last
+        return cards[last]
+
+    def reset(self) -> None:
+        self.remaining = len(self.cards)
+
+
+class QuestionDecks:
+    """A room's decks over a question bank, one per difficulty tier.
+
+    `draw` uses the requested tier, then falls back to easier tiers and then
+    harder ones; switching tiers is just moving to another deck. Once every
+    tier is exhausted they are all reset, so no question repeats until the
+    whole (category-filtered) bank has been used.
+    """
+
+    def __init__(self, bank: QuestionBank, category: Optional[str] = None,
+                 rng: Optional[random.Random] = None):
+        self.bank = bank
+        self.category = category
+        self.rng = rng or random.Random()
+        self.decks: Dict[str, Deck] = {}
+
+    def _deck(self, difficulty: str) -> Deck:
+        deck = self.decks.get(difficulty)
+        if deck is None:
+            deck = self.decks[difficulty] = Deck(self.bank.ids(difficulty, self.category))
+        return deck
+
+    @staticmethod
+    def _tiers(difficulty: str) -> List[str]:
+        level = DIFFICULTIES.index(difficulty)
+        return [difficulty] + list(DIFFICULTIES[level - 1::-1] if level else ()) + list(DIFFICULTIES[level + 1:])
+
+    def draw(self, difficulty: str) -> Dict[str, Any]:
+        """Deal the next question for `difficulty`."""
+        tiers = self._tiers(normalize_difficulty(difficulty))
+        for attempt in range(2):
+            for tier in tiers:
+                qid = self._deck(tier).draw(self.rng)
+                if qid is not None:
+                    return self.bank.questions[qid]
+            # Everything has been dealt: start over
+            for tier in tiers:
+                self._deck(tier).reset()
+        raise LookupError("Question bank is empty")
+
+
+TRIVIA_BANK = QuestionBank(TRIVIA_QUESTIONS)
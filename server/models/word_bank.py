@@ -0,0 +1,63 @@
+"""Indexed drawing-word bank and per-room shuffled decks."""
+import random
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from server.config.game_config import GAME_TOPICS
+from server.models.question_bank import DIFFICULTIES, Deck
+
+# Tiers tried, in order, when a difficulty's deck runs out
+_FALLBACK = {
+    'easy': ('easy',),
+    'medium': ('medium', 'easy'),
+    'hard': ('hard', 'medium', 'easy')
+}
+
+# {(topic, difficulty): words}, compiled once
+WORD_INDEX: Dict[Tuple[str, str], Tuple[str, ...]] = {
+    (topic, difficulty): tuple(words.get(difficulty, ()))
+    for topic, words in GAME_TOPICS.items()
+    for difficulty in DIFFICULTIES
+}
+TOPICS = tuple(GAME_TOPICS)
+
+
+def words_for(difficulty: str, topics: Optional[Iterable[str]] = None) -> List[str]:
+    """All words of a difficulty across `topics` (every topic by default)."""
+    words: List[str] = []
+    for topic in (TOPICS if topics is None else topics):
+        words.extend(WORD_INDEX.get((topic, difficulty), ()))
+    return words
+
+
+class WordDecks:
+    """A room's word decks, one per difficulty, optionally limited to topics.
+
+    A draw takes from the difficulty's deck and, if it is empty, falls back
+    to easier decks (hard -> medium -> easy). When all of those are empty
+    every deck is reset and the draw uses the requested difficulty again.
+    """
+
+    def __init__(self, topics: Optional[Iterable[str]] = None, rng: Optional[random.Random] = None):
+        self.topics = tuple(topics) if topics is not None else None
+        self.rng = rng or random.Random()
+        self.decks: Dict[str, Deck] = {}
+
+    def _deck(self, difficulty: str) -> Deck:
+        deck = self.decks.get(difficulty)
+        if deck is None:
+            deck = self.decks[difficulty] = Deck(words_for(difficulty, self.topics))
+        return deck
+
+    def draw(self, difficulty: str) -> str:
+        for tier in _FALLBACK.get(difficulty, ('easy',)):
+            word = self._deck(tier).draw(self.rng)
+            if word is not None:
+                return word
+
+        # Every word has been used: start over
+        for deck in self.decks.values():
+            deck.reset()
+        word = self._deck(difficulty).draw(self.rng)
+        if word is None:
+            raise LookupError(f"No {difficulty} words for topics {self.topics}")
+        return word
@@ -5,16 +5,23 @@ import base64
 from typing import Dict, Optional
 
 import qrcode
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
-from server.database import get_db, User, GameScore, Achievement
+from server.cluster import RoomDirectory
+from server.database import db_executor, User, Achievement
+from server.leaderboard import OVERALL, leaderboards
+from server.lifecycle import RoomLifecycle
 from server.models.game_room import GameRoom
+from server.routing import owns_room
+from server.utils.log import get_logger
 from server.utils.network import get_local_ip, get_public_ip
 from server.utils.url_shortener import create_short_url
 
+logger = get_logger('routes')
+
 # Get the absolute path to the server directory
 SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 STATIC_DIR = os.path.join(SERVER_DIR, "static")
@@ -24,77 +31,93 @@ QR_DIR = os.path.join(STATIC_DIR, "qr")
 os.makedirs(STATIC_DIR, exist_ok=True)
 os.makedirs(QR_DIR, exist_ok=True)
 
-def register_routes(app: FastAPI, templates: Jinja2Templates, rooms: Dict[str, GameRoom]):
+def register_routes(app: FastAPI, templates: Jinja2Templates, rooms: Dict[str, GameRoom],
+                    directory: RoomDirectory, lifecycle: RoomLifecycle):
     """Register all routes with the application."""
+
+    def remove_qr_code(room_id: str) -> None:
+        qr_path = os.path.join(QR_DIR, f'qr_{room_id}.png')
+        if os.path.exists(qr_path):
+            os.remove(qr_path)
+
+    lifecycle.on_release(remove_qr_code)
     
     @app.post("/api/users")
-    async def create_user(username: str, profile_picture: Optional[str] = None, db: Session = Depends(get_db)):
-        db_user = db.query(User).filter(User.username == username).first()
-        if db_user:
-            raise HTTPException(status_code=400, detail="Username already registered")
-
-        user = User(username=username)
+    async def create_user(username: str, profile_picture: Optional[str] = None):
+        image_data = None
         if profile_picture:
             try:
                 image_data = base64.b64decode(profile_picture.split(',')[1])
-                user.profile_picture = image_data
             except:
                 raise HTTPException(status_code=400, detail="Invalid profile picture format")
 
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-        return {"id": user.id, "username": user.username}
+        def create(db: Session) -> Optional[int]:
+            if db.query(User).filter(User.username == username).first():
+                return None
+            user = User(username=username, profile_picture=image_data)
+            db.add(user)
+            db.flush()
+            return user.id
+
+        user_id = await db_executor.run(create)
+        if user_id is None:
+            raise HTTPException(status_code=400, detail="Username already registered")
+        return {"id": user_id, "username": username}
 
     @app.get("/api/users/{username}")
-    async def get_user(username: str, db: Session = Depends(get_db)):
-        user = db.query(User).filter(User.username == username).first()
-        if not user:
+    async def get_user(username: str):
+        def load(db: Session) -> Optional[dict]:
+            user = db.query(User).filter(User.username == username).first()
+            if not user:
+                return None
+
+            profile_picture = None
+            if user.profile_picture:
+                profile_picture = base64.b64encode(user.profile_picture).decode('utf-8')
+
+            return {
+                "id": user.id,
+                "username": user.username,
+                "profile_picture": profile_picture,
+                "games_played": user.games_played,
+                "total_score": user.total_score,
+                "highest_score": user.highest_score
+            }
+
+        user = await db_executor.run(load)
+        if user is None:
             raise HTTPException(status_code=404, detail="User not found")
+        return user
 
-        profile_picture = None
-        if user.profile_picture:
-            profile_picture = base64.b64encode(user.profile_picture).decode('utf-8')
+    @app.get("/api/leaderboard")
+    async def get_leaderboard(game_type: Optional[str] = None, offset: int = 0, limit: int = 10):
+        return await leaderboards.fetch_page(game_type or OVERALL, offset, limit)
 
-        return {
-            "id": user.id,
-            "username": user.username,
-            "profile_picture": profile_picture,
-            "games_played": user.games_played,
-            "total_score": user.total_score,
-            "highest_score": user.highest_score
-        }
+    @app.get("/api/leaderboard/rank/{username}")
+    async def get_leaderboard_rank(username: str, game_type: Optional[str] = None):
+        entry = await leaderboards.fetch_rank(game_type or OVERALL, username)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="No score on this leaderboard")
+        return entry
 
-    @app.get("/api/leaderboard")
-    async def get_leaderboard(game_type: Optional[str] = None, db: Session = Depends(get_db)):
-        if game_type:
-            scores = db.query(GameScore).filter(GameScore.game_type == game_type) \
-                .order_by(GameScore.score.desc()).limit(10).all()
-            return [{
-                "username": db.query(User).filter(User.id == score.user_id).first().username,
-                "score": score.score,
-                "played_at": score.played_at
-            } for score in scores]
-        else:
-            users = db.query(User).order_by(User.highest_score.desc()).limit(10).all()
+    @app.get("/api/achievements/{username}")
+    async def get_achievements(username: str):
+        def load(db: Session) -> Optional[list]:
+            user = db.query(User).filter(User.username == username).first()
+            if not user:
+                return None
+
+            achievements = db.query(Achievement).filter(Achievement.user_id == user.id).all()
             return [{
-                "username": user.username,
-                "highest_score": user.highest_score,
-                "games_played": user.games_played
-            } for user in users]
+                "name": achievement.name,
+                "description": achievement.description,
+                "unlocked_at": achievement.unlocked_at
+            } for achievement in achievements]
 
-    @app.get("/api/achievements/{username}")
-    async def get_achievements(username: str, db: Session = Depends(get_db)):
-        user = db.query(User).filter(User.username == username).first()
-        if not user:
+        achievements = await db_executor.run(load)
+        if achievements is None:
             raise HTTPException(status_code=404, detail="User not found")
-
-        achievements = db.query(Achievement).filter(Achievement.user_id == user.id).all()
-        return [{
-            "name": achievement.name,
-            "description": achievement.description,
-            "unlocked_at": achievement.unlocked_at
-        } for achievement in achievements]
+        return achievements
 
     @app.get("/", response_class=HTMLResponse)
     async def home(request: Request):
@@ -107,7 +130,13 @@ def register_routes(app: FastAPI, templates: Jinja2Templates, rooms: Dict[str, G
     async def host_game(request: Request):
         try:
             room_id = ''.join(random.choices('0123456789', k=6))
+            # Pick a code this worker owns (always true outside the affinity launcher)
+            while not owns_room(room_id) or await directory.exists(room_id):
+                room_id = ''.join(random.choices('0123456789', k=6))
             rooms[room_id] = GameRoom(room_id)
+            await directory.register(room_id)
+            # Tracked from now on, so it expires even if nobody ever joins
+            lifecycle.touch(room_id)
 
             # Get local IP and create URL
             local_ip = get_local_ip()
@@ -125,9 +154,9 @@ def register_routes(app: FastAPI, templates: Jinja2Templates, rooms: Dict[str, G
                         if short_url:
                             public_url = short_url
                     except Exception as e:
-                        print(f"URL shortening failed: {e}")
+                        logger.info("URL shortening failed: %s", e, extra={'event': 'url_shortening_failed'})
             except Exception as e:
-                print(f"Public IP detection failed: {e}")
+                logger.info("Public IP detection failed: %s", e, extra={'event': 'public_ip_failed'})
 
             # Generate QR code (use local URL for faster local network access)
             qr = qrcode.QRCode(version=1, box_size=10, border=5)
@@ -140,11 +169,8 @@ def register_routes(app: FastAPI, templates: Jinja2Templates, rooms: Dict[str, G
             qr_path = os.path.join(QR_DIR, qr_filename)
             qr_image.save(qr_path)
 
-            # Log paths for debugging
-            print(f"QR Code saved to: {qr_path}")
-            print(f"Local URL: {local_url}")
-            if public_url:
-                print(f"Public URL: {public_url}")
+            logger.info("Hosting room %s at %s (public: %s)", room_id, local_url, public_url,
+                        extra={'event': 'room_hosted', 'qr_path': qr_path})
 
             return templates.TemplateResponse(
                 "host.html",
@@ -158,18 +184,19 @@ def register_routes(app: FastAPI, templates: Jinja2Templates, rooms: Dict[str, G
                 }
             )
         except Exception as e:
-            print(f"Error in host_game: {str(e)}")
+            logger.exception("Error in host_game: %s", e, extra={'event': 'host_game_failed'})
             raise HTTPException(status_code=500, detail=str(e))
 
     @app.get("/join/{room_id}", response_class=HTMLResponse)
     async def join_game(request: Request, room_id: str):
-        print(f"Join request for room {room_id}")
-        print(f"User agent: {request.headers.get('user-agent', 'Unknown')}")
-        print(f"Available rooms: {list(rooms.keys())}")
-        
-        # Check if room exists
-        if room_id not in rooms:
-            print(f"Room {room_id} not found")
+        logger.info("Join request for room %s", room_id, extra={
+            'event': 'join_request',
+            'user_agent': request.headers.get('user-agent', 'Unknown')
+        })
+
+        # Check if room exists (on any worker when clustered)
+        if not await directory.exists(room_id):
+            logger.info("Room %s not found", room_id, extra={'event': 'room_not_found'})
             return templates.TemplateResponse(
                 "error.html",
                 {
@@ -179,11 +206,9 @@ def register_routes(app: FastAPI, templates: Jinja2Templates, rooms: Dict[str, G
                 }
             )
             
-        # Get room info
-        room = rooms[room_id]
-        player_count = len([p for p in room.players.values() if p['connected']])
-        
-        print(f"Rendering player template for room {room_id} (Players: {player_count})")
+        # Get room info (only known in detail on the worker that hosts it)
+        room = rooms.get(room_id)
+        player_count = len(room.connected_sids) if room else None
         
         # Render player template with room info
         return templates.TemplateResponse(
@@ -0,0 +1,208 @@
+"""Room-affinity routing for the pre-forked launcher (`python run.py --workers N`).
+
+The launcher starts N single-process uvicorn workers on loopback ports and a
+small front proxy on the public port. Every room ID is owned by exactly one
+worker, chosen on a consistent-hash ring, and the proxy sends each request
+that names a room (`/join/{room_id}` or a Socket.IO request with `room_id=` in
+its query) to that owner. All of a room's HTTP and Socket.IO traffic therefore
+lands in one process and its `GameRoom` stays single-threaded, while different
+rooms spread across cores. Requests that don't name a room go round-robin.
+
+The proxy works at the connection level: it reads the request head, picks a
+backend and then pipes bytes both ways. Plain HTTP requests are sent with
+`Connection: close` so the next request on a browser connection is routed on
+its own; WebSocket upgrades stay open for the life of the socket.
+"""
+import asyncio
+import bisect
+import hashlib
+import itertools
+import os
+import subprocess
+import sys
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from server.utils.log import get_logger, setup_logging, shutdown_logging
+
+logger = get_logger('proxy')
+
+WORKER_INDEX_ENV = 'PARTY_GAMES_WORKER_INDEX'
+WORKER_COUNT_ENV = 'PARTY_GAMES_WORKER_COUNT'
+
+MAX_HEAD_SIZE = 64 * 1024
+PIPE_CHUNK_SIZE = 64 * 1024
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes.
+
+    Adding or removing a worker only moves the keys on the arcs that worker
+    gains or loses (about 1/N of them); every other room keeps its owner.
+    """
+
+    def __init__(self, nodes: Sequence[str], replicas: int = 64):
+        points = []
+        for node in nodes:
+            for replica in range(replicas):
+                points.append((self._hash(f'{node}#{replica}'), node))
+        points.sort()
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+    def owner(self, key: str) -> str:
+        """Return the node that owns `key`."""
+        idx = bisect.bisect(self._hashes, self._hash(key))
+        return self._nodes[idx % len(self._nodes)]
+
+
+def worker_name(index: int) -> str:
+    return f'worker-{index}'
+
+
+@lru_cache(maxsize=4)
+def _ring(worker_count: int) -> HashRing:
+    return HashRing([worker_name(i) for i in range(worker_count)])
+
+
+def owns_room(room_id: str) -> bool:
+    """Whether this process should host `room_id`.
+
+    Always true unless the process was started by the affinity launcher.
+    """
+    count = os.environ.get(WORKER_COUNT_ENV)
+    if not count:
+        return True
+    index = int(os.environ[WORKER_INDEX_ENV])
+    return _ring(int(count)).owner(room_id) == worker_name(index)
+
+
+def room_id_from_target(target: str) -> Optional[str]:
+    """Extract the room a request is for from its request-target, if any."""
+    parts = urlsplit(target)
+    if parts.path.startswith('/join/'):
+        return parts.path[len('/join/'):].strip('/') or None
+    if parts.query and 'room_id=' in parts.query:
+        values = parse_qs(parts.query).get('room_id')
+        if values:
+            return values[0]
+    return None
+
+
+class AffinityProxy:
+    """Front proxy that pins each room's traffic to its owning worker."""
+
+    def __init__(self, backends: List[Tuple[str, int]]):
+        self.backends = backends
+        self.ring = _ring(len(backends))
+        self._next_backend = itertools.cycle(range(len(backends)))
+        self.stats: Dict[str, int] = {'routed': 0, 'round_robin': 0, 'errors': 0}
+
+    def pick_backend(self, target: str) -> Tuple[str, int]:
+        room_id = room_id_from_target(target)
+        if room_id is None:
+            self.stats['round_robin'] += 1
+            return self.backends[next(self._next_backend)]
+        self.stats['routed'] += 1
+        index = int(self.ring.owner(room_id).rsplit('-', 1)[1])
+        return self.backends[index]
+
+    @staticmethod
+    def _rewrite_head(head: bytes, client_ip: str) -> Tuple[bytes, str]:
+        lines = head.decode('latin-1').split('\r\n')
+        request_line, headers = lines[0], [line for line in lines[1:] if line]
+        target = request_line.split(' ')[1]
+
+        is_upgrade = any(
+            line.lower().startswith('upgrade:') and 'websocket' in line.lower()
+            for line in headers
+        )
+        if not is_upgrade:
+            headers = [line for line in headers if not line.lower().startswith('connection:')]
+            headers.append('Connection: close')
+        headers.append(f'X-Forwarded-For: {client_ip}')
+
+        return ('\r\n'.join([request_line] + headers) + '\r\n\r\n').encode('latin-1'), target
+
+    @staticmethod
+    async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                chunk = await reader.read(PIPE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+            if writer.can_write_eof():
+                writer.write_eof()
+        except (ConnectionError, OSError):
+            pass
+
+    async def handle(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter) -> None:
+        backend_writer = None
+        try:
+            try:
+                head = await client_reader.readuntil(b'\r\n\r\n')
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return
+            peer = client_writer.get_extra_info('peername')
+            head, target = self._rewrite_head(head, peer[0] if peer else '')
+
+            host, port = self.pick_backend(target)
+            try:
+                backend_reader, backend_writer = await asyncio.open_connection(host, port)
+            except OSError:
+                self.stats['errors'] += 1
+                client_writer.write(b'HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+                await client_writer.drain()
+                return
+
+            backend_writer.write(head)
+            upstream = asyncio.create_task(self._pipe(client_reader, backend_writer))
+            # The exchange is over once the backend stops sending
+            await self._pipe(backend_reader, client_writer)
+            upstream.cancel()
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning("Proxy error: %s", e, extra={'event': 'proxy_error'})
+        finally:
+            for writer in (backend_writer, client_writer):
+                if writer is not None:
+                    writer.close()
+
+    async def serve(self, host: str, port: int) -> None:
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEAD_SIZE)
+        logger.warning("Affinity proxy listening on %s:%s for %d workers", host, port, len(self.backends),
+                       extra={'event': 'proxy_started'})
+        async with server:
+            await server.serve_forever()
+
+
+def run_cluster(workers: int, host: str = '0.0.0.0', port: int = 8000) -> None:
+    """Start `workers` uvicorn processes behind an affinity proxy and block."""
+    backends = [('127.0.0.1', port + 1 + i) for i in range(workers)]
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    processes = []
+    for index, (backend_host, backend_port) in enumerate(backends):
+        env = dict(os.environ, **{WORKER_INDEX_ENV: str(index), WORKER_COUNT_ENV: str(workers)})
+        processes.append(subprocess.Popen([
+            sys.executable, '-m', 'uvicorn', 'server.app_factory:create_app', '--factory',
+            '--host', backend_host, '--port', str(backend_port)
+        ], env=env, cwd=project_root))
+
+    setup_logging()
+    try:
+        asyncio.run(AffinityProxy(backends).serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        shutdown_logging()
@@ -1,30 +1,260 @@
 import base64
 import random
+import secrets
 from datetime import datetime
+from functools import lru_cache, partial
 from typing import Dict, Optional
 
 import socketio
 
+from ..cluster import RoomDirectory
+from ..journal import RoomJournal
+from ..lifecycle import RoomLifecycle
 from ..models.game_room import GameRoom, GameError
-from ..database import User
+from ..database import db_executor, get_or_create_user
 from ..config.game_config import GAME_CONFIG, MUSIC_CONFIG
 from ..config.questions import CHASE_QUESTIONS
+from ..utils.log import get_logger
+from ..utils.scheduler import RoundScheduler
+from .schemas import (
+    DrawingUpdate, JoinRoom, RecoverState, StartGame, SubmitAnswer, SubmitDrawing, SubmitGuess
+)
+from .stroke_relay import StrokeRelay
+
+logger = get_logger('sockets')
+
+def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom],
+                           sid_rooms: Dict[str, str], directory: RoomDirectory,
+                           scheduler: RoundScheduler, journal: RoomJournal,
+                           lifecycle: RoomLifecycle):
+    """Register all socket events.
+
+    `sid_rooms` maps each joined sid to its room_id. It is the source of truth
+    for which room an event belongs to; handlers never trust a client-sent
+    room_id except when joining.
+
+    Handlers that take a payload receive it already decoded into its schema
+    object (see `server.sockets.schemas`); `EventValidator.install` must be
+    called once these handlers are registered.
+
+    Round deadlines and the pauses between rounds run on `scheduler`; the
+    server, not the clients' countdowns, decides when a turn or question is
+    over.
+
+    Every state change that is synced to clients is also written to
+    `journal`, so rooms survive a restart. Returns `resume_round(room_id)`,
+    which restarts the round of a room rebuilt from the journal mid-game
+    (its timers did not survive the restart); call it once the event loop
+    is running.
+    """
+    stroke_relay = StrokeRelay(sio)
+    lifecycle.on_release(stroke_relay.discard_room)
+
+    def get_player_room(sid: str) -> Optional[GameRoom]:
+        room_id = sid_rooms.get(sid)
+        return rooms.get(room_id) if room_id is not None else None
+
+    def forget_sid(sid: str, room_id: str) -> None:
+        # Only drop the mapping if it still points at this room
+        if sid_rooms.get(sid) == room_id:
+            del sid_rooms[sid]
+
+    def name_taken(room: GameRoom, name: str) -> bool:
+        existing_sid = room.find_player(name)
+        return existing_sid is not None and room.players[existing_sid].connected
+
+    async def reject_join(sid: str, message: str) -> None:
+        await sio.emit('join_error', {'message': message}, room=sid)
+        await sio.disconnect(sid)
+
+    async def sync_state(room: GameRoom, skip_sid: Optional[str] = None) -> None:
+        # Broadcast whatever changed since the last commit as a versioned delta
+        delta = room.commit_state()
+        journal.record(room)
+        if delta:
+            await sio.emit('state_delta', delta, room=room.room_id, skip_sid=skip_sid)
+
+    def start_round_timer(room: GameRoom, seconds: float, on_expired) -> None:
+        # A room has one running deadline; scheduling it again replaces it
+        room.turn_start_time = room.clock.now()
+        room.timer_task = scheduler.schedule(room.room_id, 'round', seconds, on_expired, room.room_id)
+
+    def stop_game_timers(room: GameRoom) -> None:
+        scheduler.cancel_room(room.room_id)
+        room.timer_task = None
+
+    def is_playing(room: Optional[GameRoom], game_type: str) -> bool:
+        # Timer callbacks re-check this: the game may have ended or moved on
+        return (room is not None and room.current_game == game_type
+                and room.game_state == 'playing' and not room.state_lock)
+
+    async def whispers_turn_expired(room_id: str) -> None:
+        room = rooms.get(room_id)
+        if not is_playing(room, 'chinese_whispers'):
+            return
+        timed_out_sid = room.player_order[room.current_player_index]
+        if room.current_player_index >= len(room.player_order) - 1:
+            await finish_whispers_round(room, room.player_answers.get(timed_out_sid))
+        else:
+            room.current_player_index += 1
+            next_player_id = room.player_order[room.current_player_index]
+            await sio.emit('your_turn', {
+                'previous_guess': room.player_answers.get(timed_out_sid)
+            }, room=next_player_id)
+            await sio.emit('next_player', {
+                'player': room.players[next_player_id].name,
+                'timed_out': True
+            }, room=room_id)
+            start_round_timer(room, _get_drawing_time_limit(room.active_count), whispers_turn_expired)
+        await sync_state(room)
+
+    async def finish_whispers_round(room: GameRoom, final_guess: Optional[str]) -> None:
+        room_id = room.room_id
+        scheduler.cancel(room_id, 'round')
+        room.state_lock = True  # No more turns until the next round starts
+
+        await sio.emit('round_complete', {
+            'original_word': room.current_word,
+            'final_guess': final_guess,
+            'scores': room.public_scores(),
+            'drawings': room.drawings
+        }, room=room_id)
+
+        # Check if game is fully done
+        if room.round >= room.total_rounds:
+            await sio.emit('game_complete', {
+                'final_scores': room.public_scores(),
+                'winner': _highest_scorer_name(room)
+            }, room=room_id)
+            room.record_game_results()
+            room.game_state = 'waiting'
+            room.current_game = None
+            room.state_lock = False
+            stop_game_timers(room)
+        else:
+            scheduler.schedule(room_id, 'transition', GAME_CONFIG['round_transition_delay'],
+                               start_next_whispers_round, room_id)
+
+    async def start_next_whispers_round(room_id: str) -> None:
+        room = rooms.get(room_id)
+        if room is None or room.current_game != 'chinese_whispers' or room.game_state != 'playing':
+            return
+        room.round += 1
+        room.reset_round()
+        # new word, reset index
+        room.current_word = room.get_next_word()
+        room.current_player_index = 0
+        room.state_lock = False
+
+        # Let players know the next round started
+        for pid in room.player_sids:
+            is_drawer = (pid == room.player_order[0])
+            await sio.emit('round_start', {
+                'round': room.round,
+                'is_drawer': is_drawer,
+                'word': room.current_word if is_drawer else None
+            }, room=pid)
+
+        start_round_timer(room, _get_drawing_time_limit(room.active_count), whispers_turn_expired)
+        await sync_state(room)
+
+    async def trivia_question_expired(room_id: str) -> None:
+        room = rooms.get(room_id)
+        if not is_playing(room, 'trivia'):
+            return
+        await finish_trivia_question(room)
+        await sync_state(room)
+
+    async def finish_trivia_question(room: GameRoom) -> None:
+        room_id = room.room_id
+        scheduler.cancel(room_id, 'round')
+        room.state_lock = True  # Late answers are ignored from here on
+
+        # Calculate stats for this question (nobody may have answered in time)
+        answers = room.player_answers
+        correct = room.current_question['correct']
+        times = [ans['time'] for ans in answers.values()]
+        answer_stats = {
+            'correct_count': sum(1 for ans in answers.values() if ans['answer'] == correct),
+            'fastest_time': min(times, default=None),
+            'average_time': sum(times) / len(times) if times else None
+        }
+
+        # End of round
+        await sio.emit('round_complete', {
+            'question': room.current_question,
+            'answers': {
+                room.players[p].name: ans['answer'] for p, ans in answers.items()
+            },
+            'scores': room.public_scores(),
+            'stats': answer_stats
+        }, room=room_id)
+
+        # Check if final round
+        if room.round >= room.total_rounds:
+            # Calculate final achievements and stats
+            fastest = min(answers.items(), key=lambda item: item[1]['time'], default=None)
+            final_stats = {
+                'perfect_scores': sum(1 for score in room.scores.values() if score >= room.total_rounds * GAME_CONFIG['points']['correct_trivia']),
+                'total_correct': answer_stats['correct_count'],
+                'fastest_player': room.players[fastest[0]].name if fastest and fastest[0] in room.players else None
+            }
 
-def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]):
-    """Register all socket events."""
+            await sio.emit('game_complete', {
+                'final_scores': room.public_scores(),
+                'winner': _highest_scorer_name(room),
+                'achievements': room.public_achievements(),
+                'stats': final_stats
+            }, room=room_id)
+            room.record_game_results()
+            room.game_state = 'waiting'
+            room.current_game = None
+            room.state_lock = False
+            stop_game_timers(room)
+        else:
+            scheduler.schedule(room_id, 'transition', GAME_CONFIG['round_transition_delay'],
+                               start_next_trivia_question, room_id)
+
+    async def start_next_trivia_question(room_id: str) -> None:
+        room = rooms.get(room_id)
+        if room is None or room.current_game != 'trivia' or room.game_state != 'playing':
+            return
+        room.round += 1
+        room.reset_round()
+        room.current_question = room.get_next_question()
+        room.round_start_time = room.clock.now()  # Reset timer
+        room.state_lock = False
+        time_limit = _get_trivia_time_limit(room.active_count)
+
+        # Send next question with synchronized start time
+        await sio.emit('next_question', {
+            'question': room.current_question,
+            'round': room.round,
+            'time_limit': time_limit,
+            'start_time': room.clock.wall(room.round_start_time),
+            'total_rounds': room.total_rounds
+        }, room=room_id)
+
+        await sio.emit('round_start', {
+            'round': room.round,
+            'question': room.current_question,
+            'time_limit': time_limit
+        }, room=room_id)
+
+        start_round_timer(room, time_limit, trivia_question_expired)
+        await sync_state(room)
 
     @sio.event
     async def connect(sid, environ):
-        print(f"Client connected: {sid}")
+        logger.debug("Client connected: %s", sid, extra={'event': 'client_connected'})
         query = environ.get('QUERY_STRING', '')
         # If the room is missing, we can either let them join or disconnect
         room_id = None
         if 'room_id=' in query:
             room_id = query.split('room_id=')[1].split('&')[0]
-            print(f"Client {sid} attempting to connect to room {room_id}")
             # If that room doesn't exist, we can disconnect them or create it
-            if room_id not in rooms:
-                print(f"Warning: Room {room_id} not found")
+            if not await directory.exists(room_id):
+                logger.info("Connect to unknown room %s from %s", room_id, sid, extra={'event': 'room_not_found'})
                 await sio.emit(
                     'room_status',
                     {'exists': False, 'message': 'Room not found or expired'},
@@ -35,7 +265,7 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
         # Otherwise, accept connection if we want
 
     @sio.event
-    async def join_room(sid, data):
+    async def join_room(sid, data: JoinRoom):
         """
         Handle player joining a room:
         - If is_host=True, create the room if needed, or replace old host
@@ -43,21 +273,24 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
         - Send join confirmations, player lists, etc.
         """
         try:
-            room_id = data['room_id']
-            is_host = data.get('is_host', False)
-            player_name = 'Host' if is_host else data['player_name']
-            profile_picture = data.get('profile_picture')
+            room_id = data.room_id
+            is_host = data.is_host
+            player_name = 'Host' if is_host else data.player_name.strip()
+            profile_picture = data.profile_picture
 
-            print(f"join_room request from {sid}: {data}")
+            if not player_name:
+                await sio.emit('join_error', {'message': 'Please enter a name'}, room=sid)
+                return
 
             # If hosting a brand new room
             if room_id not in rooms and is_host:
                 rooms[room_id] = GameRoom(room_id)
-                print(f"Created new room: {room_id}")
+                await directory.register(room_id)
+                logger.info("Created new room: %s", room_id, extra={'event': 'room_created'})
 
             # If room does not exist, error out
             if room_id not in rooms:
-                print(f"Error: Room {room_id} not found")
+                logger.info("Join for unknown room %s from %s", room_id, sid, extra={'event': 'room_not_found'})
                 await sio.emit('join_error', {
                     'message': 'Room not found or expired. Please scan again.'
                 }, room=sid)
@@ -70,14 +303,13 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
             if is_host:
                 # If there is an old host SID, remove it
                 if room.host_sid and room.host_sid in room.players:
-                    del room.players[room.host_sid]
+                    room.remove_player(room.host_sid)
+                    forget_sid(room.host_sid, room_id)
                     await sio.leave_room(room.host_sid, room_id)
                 room.host_sid = sid
-                room.players[sid] = {
-                    'name': 'Host',
-                    'is_host': True,
-                    'connected': True,
-                }
+                sid_rooms[sid] = room_id
+                room.add_player(sid, 'Host', is_host=True)
+                journal.record(room)
                 await sio.enter_room(sid, room_id)
                 await sio.emit('join_success', {
                     'player_name': 'Host',
@@ -86,79 +318,60 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
                 }, room=sid)
                 return
 
-            # Non-host: Check username conflicts
-            for s, p in room.players.items():
-                if not p.get('is_host') and p['name'] == player_name and p['connected']:
-                    await sio.emit('join_error', {
-                        'message': 'Username already taken'
-                    }, room=sid)
-                    await sio.disconnect(sid)
-                    return
-
-            # Possibly a rejoin
-            existing_sid = None
-            for s, p in room.players.items():
-                if not p.get('is_host') and p['name'] == player_name and not p['connected']:
-                    existing_sid = s
-                    break
-            # Clean up old SID if we found it
-            if existing_sid and existing_sid in room.players:
-                try:
-                    await sio.leave_room(existing_sid, room_id)
-                    del room.players[existing_sid]
-                except Exception as e:
-                    print(f"Error removing old connection: {e}")
-
-            # Check or create DB user
-            user = room.db.query(User).filter(User.username == player_name).first()
-            if not user:
-                user = User(username=player_name)
-                room.db.add(user)
-                room.db.commit()
+            # Non-host: Check username conflicts (names are case-insensitive)
+            if name_taken(room, player_name):
+                await reject_join(sid, 'Username already taken')
+                return
 
             # If a base64-encoded profile picture was sent, attach it
+            image_data = None
             if profile_picture:
                 try:
                     # Typically "data:image/png;base64,...."
                     image_data = base64.b64decode(profile_picture.split(',')[1])
-                    user.profile_picture = image_data
-                    room.db.commit()
                 except Exception as e:
-                    print(f"Error processing profile picture: {e}")
-            room.db.refresh(user)
+                    logger.warning("Error processing profile picture: %s", e, extra={'event': 'profile_picture_invalid'})
+
+            # Check or create DB user (on the database threads, not the event loop)
+            user_id = await db_executor.run(
+                partial(get_or_create_user, username=player_name, profile_picture=image_data)
+            )
+
+            # Other events ran while the database worked: check the room again
+            room = rooms.get(room_id)
+            if room is None:
+                await reject_join(sid, 'Room not found or expired. Please scan again.')
+                return
+            if name_taken(room, player_name):
+                await reject_join(sid, 'Username already taken')
+                return
+
+            # Possibly a rejoin: clean up the disconnected seat with that name
+            existing_sid = room.find_player(player_name)
+            if existing_sid is not None:
+                try:
+                    await sio.leave_room(existing_sid, room_id)
+                    room.remove_player(existing_sid)
+                    forget_sid(existing_sid, room_id)
+                except Exception as e:
+                    logger.warning("Error removing old connection: %s", e, extra={'event': 'rejoin_cleanup_failed'})
 
             # Now store the player in room
-            room.players[sid] = {
-                'name': player_name,
-                'user_id': user.id,
-                'profile': profile_picture or '',
-                'score': 0,
-                'connected': True,
-                'is_host': False
-            }
+            player = room.add_player(sid, player_name, profile_picture, user_id=user_id)
+            sid_rooms[sid] = room_id
             await sio.enter_room(sid, room_id)
 
-            # If the room is mid-game, send partial state
-            # (not fully implemented here—just an example)
-            if room.game_state != 'waiting':
-                # e.g. send 'game_state' event to the rejoining sid
-                pass
-
             # Build a fresh player_list for the entire room
-            player_list = []
-            for player_sid, player_data in room.players.items():
-                if player_data['connected'] and not player_data.get('is_host'):
-                    player_list.append({
-                        'name': player_data['name'],
-                        'score': player_data.get('score', 0)
-                    })
+            player_list = [player.summary() for player in room.active_players()]
 
             # Confirm join to this sid only
             await sio.emit('join_confirmed', {
                 'player_name': player_name,
                 'room_id': room_id,
                 'is_host': False,
-                'current_players': player_list
+                'current_players': player_list,
+                # Only this client learns it; recover_state needs it to reclaim the seat
+                'reconnect_token': player.reconnect_token
             }, room=sid)
 
             # Notify everyone else in the room
@@ -167,28 +380,33 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
                 'new_player': player_name
             }, room=room_id)
 
-            print(f"Player {player_name} successfully joined room {room_id}")
+            await sync_state(room)
+
+            # If the room is mid-game, bring the new player up to date
+            if room.game_state != 'waiting':
+                await sio.emit('game_state', room.get_state_since(None), room=sid)
+
+            logger.info("Player %s joined room %s", player_name, room_id, extra={'event': 'player_joined'})
 
         except Exception as e:
-            print(f"Error joining room: {e}")
+            logger.warning("Error joining room: %s", e, extra={'event': 'join_failed'})
             await sio.emit('join_error', {'message': str(e)}, room=sid)
             await sio.disconnect(sid)
 
     # Example of the "start_game" event logic
     @sio.event
-    async def start_game(sid, data):
+    async def start_game(sid, data: StartGame):
         """
         Host triggers this to begin a chosen game_type (chase/trivia/chinese_whispers).
         We'll handle the logic for setting up the first round, etc.
         """
+        room = get_player_room(sid)
         try:
-            room_id = data['room_id']
-            game_type = data['game_type']
-            if room_id not in rooms:
+            game_type = data.game_type
+            if room is None:
                 await sio.emit('game_error', {'message': 'Room not found'}, room=sid)
                 return
-
-            room = rooms[room_id]
+            room_id = room.room_id
 
             # Must be host
             if sid != room.host_sid:
@@ -196,7 +414,7 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
                 return
 
             # Count active players (excluding host)
-            active_players = [pid for pid, p in room.players.items() if p['connected'] and not p.get('is_host')]
+            active_players = room.active_sids()
             if len(active_players) < GAME_CONFIG['game_modes'][game_type]['min_players']:
                 await sio.emit('game_error', {
                     'message': f"Need at least {GAME_CONFIG['game_modes'][game_type]['min_players']} players to start {game_type}"
@@ -204,12 +422,15 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
                 return
 
             # Initialize common stuff
+            stop_game_timers(room)
+            room.state_lock = False
             room.current_game = game_type
             room.game_state = 'playing'
             room.round = 1
             room.total_rounds = GAME_CONFIG['rounds_per_game']
             room.scores = {pid: 0 for pid in active_players}  # track scores
             room.player_answers = {}
+            room.correct_answers = {}
             room.drawings = []
             room.player_order = active_players[:]  # naive approach
             random.shuffle(room.player_order)
@@ -218,23 +439,24 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
                 room.current_word = room.get_next_word()
                 room.current_player_index = 0
                 # "is_drawer" for the first player
-                for player_sid in room.players:
-                    if room.players[player_sid]['connected'] and not room.players[player_sid].get('is_host'):
-                        is_drawer = (player_sid == room.player_order[0])
-                        await sio.emit('game_started', {
-                            'game_type': 'chinese_whispers',
-                            'round': 1,
-                            'total_rounds': room.total_rounds,
-                            'is_drawer': is_drawer,
-                            'word': room.current_word if is_drawer else None,
-                            'time_limit': _get_drawing_time_limit(len(active_players)),
-                            'game_state': 'playing'
-                        }, room=player_sid)
+                for player_sid in active_players:
+                    is_drawer = (player_sid == room.player_order[0])
+                    await sio.emit('game_started', {
+                        'game_type': 'chinese_whispers',
+                        'round': 1,
+                        'total_rounds': room.total_rounds,
+                        'is_drawer': is_drawer,
+                        'word': room.current_word if is_drawer else None,
+                        'time_limit': _get_drawing_time_limit(len(active_players)),
+                        'stroke_palette': room.drawing_state['tools']['colors'],
+                        'game_state': 'playing'
+                    }, room=player_sid)
+                start_round_timer(room, _get_drawing_time_limit(len(active_players)), whispers_turn_expired)
 
             elif game_type == 'trivia':
                 room.current_question = room.get_next_question()
                 room.player_answers = {}  # Reset answers for new question
-                room.round_start_time = datetime.now()  # Start timer
+                room.round_start_time = room.clock.now()  # Start timer
                 
                 # Broadcast to all players
                 await sio.emit('game_started', {
@@ -244,9 +466,10 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
                     'question': room.current_question,
                     'time_limit': _get_trivia_time_limit(len(active_players)),
                     'game_state': 'playing',
-                    'scores': room.scores,
-                    'start_time': room.round_start_time.timestamp()
+                    'scores': room.public_scores(),
+                    'start_time': room.clock.wall(room.round_start_time)
                 }, room=room_id)
+                start_round_timer(room, _get_trivia_time_limit(len(active_players)), trivia_question_expired)
 
             elif game_type == 'chase':
                 # Pick a random chaser
@@ -274,19 +497,18 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
                     },
                 }
                 # Broadcast to all
-                for player_sid in room.players:
-                    if room.players[player_sid]['connected'] and not room.players[player_sid].get('is_host'):
-                        is_chaser = (player_sid == chaser_sid)
-                        await sio.emit('game_started', {
-                            'game_type': 'chase',
-                            'is_chaser': is_chaser,
-                            'chase_category': room.chase_category,
-                            'board_size': room.chase_state['board_size'],
-                            'time_limit': _get_chase_time_limit(len(active_players)),
-                            'game_state': 'playing',
-                            'chaser_name': room.players[chaser_sid]['name'],
-                            'scores': room.scores
-                        }, room=player_sid)
+                for player_sid in active_players:
+                    is_chaser = (player_sid == chaser_sid)
+                    await sio.emit('game_started', {
+                        'game_type': 'chase',
+                        'is_chaser': is_chaser,
+                        'chase_category': room.chase_category,
+                        'board_size': room.chase_state['board_size'],
+                        'time_limit': _get_chase_time_limit(len(active_players)),
+                        'game_state': 'playing',
+                        'chaser_name': room.players[chaser_sid].name,
+                        'scores': room.public_scores()
+                    }, room=player_sid)
 
             # Optionally play music
             await sio.emit('play_music', {
@@ -295,27 +517,28 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
                 'loop': True
             }, room=room_id)
 
+            await sync_state(room)
+
         except Exception as e:
-            import traceback
-            print(f"Error starting game: {e}")
-            print(traceback.format_exc())
+            logger.exception("Error starting game: %s", e, extra={'event': 'start_game_failed'})
             await sio.emit('game_error', {'message': str(e)}, room=sid)
             # Possibly reset
-            if room_id in rooms:
-                rooms[room_id].game_state = 'waiting'
-                rooms[room_id].current_game = None
+            if room is not None:
+                stop_game_timers(room)
+                room.game_state = 'waiting'
+                room.current_game = None
 
     @sio.event
-    async def submit_drawing(sid, data):
+    async def submit_drawing(sid, data: SubmitDrawing):
         """When the drawer in Chinese Whispers finishes and passes the drawing along."""
         try:
-            room_id = data['room_id']
-            drawing_data = data['drawing']
-            if room_id not in rooms:
+            drawing_data = data.drawing
+            room = get_player_room(sid)
+            if room is None:
                 return
-            room = rooms[room_id]
+            room_id = room.room_id
 
-            if room.game_state != 'playing' or room.current_game != 'chinese_whispers':
+            if not is_playing(room, 'chinese_whispers'):
                 return
 
             # Must be the current drawer
@@ -325,7 +548,7 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
 
             # Store the drawing
             room.drawings.append({
-                'player': room.players[sid]['name'],
+                'player': room.players[sid].name,
                 'data': drawing_data,
                 'timestamp': datetime.now()
             })
@@ -337,28 +560,48 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
             # Send the drawing to that next player
             await sio.emit('receive_drawing', {
                 'drawing': drawing_data,
-                'previous_player': room.players[sid]['name']
+                'previous_player': room.players[sid].name
             }, room=next_player_id)
 
             # Notify entire room of whose turn it is
             await sio.emit('next_player', {
-                'player': room.players[next_player_id]['name']
+                'player': room.players[next_player_id].name
             }, room=room_id)
+            start_round_timer(room, _get_drawing_time_limit(room.active_count), whispers_turn_expired)
+
+            await sync_state(room)
 
         except Exception as e:
-            print(f"Error in submit_drawing: {e}")
+            logger.warning("Error in submit_drawing: %s", e, extra={'event': 'handler_error'})
             await sio.emit('game_error', {'message': str(e)}, room=sid)
 
     @sio.event
-    async def submit_guess(sid, data):
+    async def drawing_update(sid, data: DrawingUpdate):
+        """Live stroke segment from the current drawer, relayed in batches."""
+        try:
+            room = get_player_room(sid)
+            if room is None:
+                return
+            if room.current_game != 'chinese_whispers' or room.game_state != 'playing':
+                return
+            if not room.player_order or sid != room.player_order[room.current_player_index]:
+                return
+
+            stroke_relay.push(room.room_id, sid, data.segment(), room.drawing_state['tools']['colors'])
+
+        except Exception as e:
+            logger.warning("Error in drawing_update: %s", e, extra={'event': 'handler_error'})
+
+    @sio.event
+    async def submit_guess(sid, data: SubmitGuess):
         """In Chinese Whispers, a guess about the final word (or the next clue)."""
         try:
-            room_id = data['room_id']
-            guess = data['guess'].strip().lower()
-            if room_id not in rooms:
+            guess = data.guess.strip().lower()
+            room = get_player_room(sid)
+            if room is None:
                 return
-            room = rooms[room_id]
-            if room.current_game != 'chinese_whispers':
+            room_id = room.room_id
+            if not is_playing(room, 'chinese_whispers'):
                 return
 
             # Must be that player's turn
@@ -376,40 +619,7 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
 
             # If last in order, that means the round is done
             if room.current_player_index == len(room.player_order) - 1:
-                # Round ends
-                await sio.emit('round_complete', {
-                    'original_word': room.current_word,
-                    'final_guess': guess,
-                    'scores': room.scores,
-                    'drawings': room.drawings
-                }, room=room_id)
-
-                # Check if game is fully done
-                if room.round >= room.total_rounds:
-                    # Game over
-                    await sio.emit('game_complete', {
-                        'final_scores': room.scores,
-                        'winner': _highest_scorer_name(room)
-                    }, room=room_id)
-                    room.game_state = 'waiting'
-                    room.current_game = None
-                else:
-                    # Next round
-                    room.round += 1
-                    room.reset_round()
-                    # new word, reset index
-                    room.current_word = room.get_next_word()
-                    room.current_player_index = 0
-
-                    # Let players know the next round started
-                    for pid in room.players:
-                        if not room.players[pid].get('is_host'):
-                            is_drawer = (pid == room.player_order[0])
-                            await sio.emit('round_start', {
-                                'round': room.round,
-                                'is_drawer': is_drawer,
-                                'word': room.current_word if is_drawer else None
-                            }, room=pid)
+                await finish_whispers_round(room, guess)
             else:
                 # Move to next
                 room.current_player_index = (room.current_player_index + 1) % len(room.player_order)
@@ -418,30 +628,33 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
                     'previous_guess': guess
                 }, room=next_player_id)
                 await sio.emit('next_player', {
-                    'player': room.players[next_player_id]['name']
+                    'player': room.players[next_player_id].name
                 }, room=room_id)
+                start_round_timer(room, _get_drawing_time_limit(room.active_count), whispers_turn_expired)
+
+            await sync_state(room)
 
         except Exception as e:
-            print(f"Error in submit_guess: {e}")
+            logger.warning("Error in submit_guess: %s", e, extra={'event': 'handler_error'})
             await sio.emit('game_error', {'message': str(e)}, room=sid)
 
     @sio.event
-    async def submit_answer(sid, data):
+    async def submit_answer(sid, data: SubmitAnswer):
         """In Trivia, user sends an answer. We check correctness, update scores, handle next round."""
         try:
-            room_id = data['room_id']
-            answer = data['answer']
-            answer_time = data.get('answer_time')  # Time taken to answer
+            answer = data.answer
+            answer_time = data.answer_time  # Time taken to answer
 
-            if room_id not in rooms:
+            room = get_player_room(sid)
+            if room is None:
                 return
-            room = rooms[room_id]
-            if room.current_game != 'trivia' or room.game_state != 'playing':
+            room_id = room.room_id
+            if not is_playing(room, 'trivia'):
                 return
 
             # Check if answer is within time limit
-            elapsed_time = (datetime.now() - room.round_start_time).total_seconds()
-            time_limit = _get_trivia_time_limit(len([p for p in room.players.values() if p['connected'] and not p.get('is_host')]))
+            elapsed_time = room.clock.elapsed(room.round_start_time)
+            time_limit = _get_trivia_time_limit(room.active_count)
             if elapsed_time > time_limit:
                 await sio.emit('answer_feedback', {
                     'error': 'Time expired',
@@ -474,135 +687,139 @@ def register_socket_events(sio: socketio.AsyncServer, rooms: Dict[str, GameRoom]
             }, room=sid)
 
             # Update all players on answer progress
-            active_players = [pid for pid, p in room.players.items() if p['connected'] and not p.get('is_host')]
             await sio.emit('answer_progress', {
                 'answered': len(room.player_answers),
-                'total': len(active_players)
+                'total': room.active_count
             }, room=room_id)
 
-            # If everyone has answered or time is up
-            if len(room.player_answers) >= len(active_players) or elapsed_time >= time_limit:
-                # Calculate stats for this question
-                answer_stats = {
-                    'correct_count': sum(1 for ans in room.player_answers.values() 
-                                      if ans['answer'] == room.current_question['correct']),
-                    'fastest_time': min(ans['time'] for ans in room.player_answers.values()),
-                    'average_time': sum(ans['time'] for ans in room.player_answers.values()) / len(room.player_answers)
-                }
-
-                # End of round
-                await sio.emit('round_complete', {
-                    'question': room.current_question,
-                    'answers': {
-                        room.players[p]['name']: ans['answer'] for p, ans in room.player_answers.items()
-                    },
-                    'scores': room.scores,
-                    'stats': answer_stats
-                }, room=room_id)
+            # Once everyone has answered there is no need to wait out the clock
+            if len(room.player_answers) >= room.active_count:
+                await finish_trivia_question(room)
 
-                # Check if final round
-                if room.round >= room.total_rounds:
-                    # Calculate final achievements and stats
-                    final_stats = {
-                        'perfect_scores': sum(1 for score in room.scores.values() if score >= room.total_rounds * GAME_CONFIG['points']['correct_trivia']),
-                        'total_correct': sum(1 for ans in room.player_answers.values() if ans['answer'] == room.current_question['correct']),
-                        'fastest_player': min(((sid, ans['time']) for sid, ans in room.player_answers.items()), key=lambda x: x[1])[0]
-                    }
-                    
-                    await sio.emit('game_complete', {
-                        'final_scores': room.scores,
-                        'winner': _highest_scorer_name(room),
-                        'achievements': room.achievements,
-                        'stats': final_stats
-                    }, room=room_id)
-                    room.game_state = 'waiting'
-                    room.current_game = None
-                else:
-                    # Next round
-                    room.round += 1
-                    room.reset_round()
-                    room.current_question = room.get_next_question()
-                    room.round_start_time = datetime.now()  # Reset timer
-                    
-                    # Send next question with synchronized start time
-                    await sio.emit('next_question', {
-                        'question': room.current_question,
-                        'round': room.round,
-                        'time_limit': time_limit,
-                        'start_time': room.round_start_time.timestamp(),
-                        'total_rounds': room.total_rounds
-                    }, room=room_id)
-
-                    await sio.emit('round_start', {
-                        'round': room.round,
-                        'question': room.current_question,
-                        'time_limit': _get_trivia_time_limit(len(active_players))
-                    }, room=room_id)
+            await sync_state(room)
 
         except Exception as e:
-            print(f"Error in submit_answer: {e}")
+            logger.warning("Error in submit_answer: %s", e, extra={'event': 'handler_error'})
             await sio.emit('game_error', {'message': str(e)}, room=sid)
 
     @sio.event
-    async def disconnect(sid):
-        print(f"Client disconnected: {sid}")
+    async def disconnect(sid, reason=None):
+        logger.debug("Client disconnected: %s (%s)", sid, reason, extra={'event': 'client_disconnected'})
         # Mark them disconnected and handle special cases (chaser, drawer, etc.)
-        for room in rooms.values():
-            if sid in room.players:
-                room.players[sid]['connected'] = False
-                disc_name = room.players[sid]['name']
-
-                # If chaser or chase contestant leaves mid-chase
-                if room.current_game == 'chase':
-                    if sid == room.chaser:
-                        room.chaser = None
-                        room.game_state = 'waiting'
-                        await sio.emit('chase_cancelled', {
-                            'reason': f'Chaser {disc_name} disconnected'
-                        }, room=room.room_id)
-                    elif sid == room.chase_contestant:
-                        room.chase_contestant = None
-                        room.game_state = 'chase_setup'
-                        await sio.emit('chase_cancelled', {
-                            'reason': f'Contestant {disc_name} disconnected'
-                        }, room=room.room_id)
-
-                # Update players
-                active_players = [
-                    p for p in room.players.values()
-                    if p['connected'] and not p.get('is_host')
-                ]
-                if len(active_players) < 2 and room.game_state == 'playing':
-                    room.game_state = 'waiting'
-                    room.current_game = None
-                    await sio.emit('game_cancelled', {
-                        'reason': 'Not enough players'
-                    }, room=room.room_id)
-
-                # If they were drawing in Chinese Whispers
-                if (room.current_game == 'chinese_whispers' and
-                    sid == room.player_order[room.current_player_index]):
-                    room.current_player_index = (room.current_player_index + 1) % len(room.player_order)
-                    next_player = room.player_order[room.current_player_index]
-                    while not room.players[next_player]['connected']:
-                        room.current_player_index = (room.current_player_index + 1) % len(room.player_order)
-                        next_player = room.player_order[room.current_player_index]
-                    await sio.emit('next_player', {
-                        'player': room.players[next_player]['name'],
-                        'skipped_disconnected': True
-                    }, room=room.room_id)
-
-                # Broadcast updated players
-                updated_list = [
-                    {'name': p['name'], 'score': p.get('score', 0)}
-                    for s, p in room.players.items() if p['connected'] and not p.get('is_host')
-                ]
-                await sio.emit('player_left', {
-                    'players': updated_list,
-                    'disconnected_player': disc_name
-                }, room=room.room_id)
-
-# Helper methods for time-limits
+        room_id = sid_rooms.pop(sid, None)
+        room = rooms.get(room_id) if room_id is not None else None
+        if room is None or sid not in room.players:
+            return
+        room.set_connected(sid, False)
+        disc_name = room.players[sid].name
+
+        # If chaser or chase contestant leaves mid-chase
+        if room.current_game == 'chase':
+            if sid == room.chaser:
+                room.chaser = None
+                room.game_state = 'waiting'
+                await sio.emit('chase_cancelled', {
+                    'reason': f'Chaser {disc_name} disconnected'
+                }, room=room_id)
+            elif sid == room.chase_contestant:
+                room.chase_contestant = None
+                room.game_state = 'chase_setup'
+                await sio.emit('chase_cancelled', {
+                    'reason': f'Contestant {disc_name} disconnected'
+                }, room=room_id)
+
+        # Update players
+        if room.active_count < 2 and room.game_state == 'playing':
+            stop_game_timers(room)
+            room.game_state = 'waiting'
+            room.current_game = None
+            await sio.emit('game_cancelled', {
+                'reason': 'Not enough players'
+            }, room=room_id)
+
+        # If they were drawing in Chinese Whispers
+        if (room.current_game == 'chinese_whispers' and
+            sid == room.player_order[room.current_player_index]):
+            room.current_player_index = (room.current_player_index + 1) % len(room.player_order)
+            next_player = room.player_order[room.current_player_index]
+            while not room.players[next_player].connected:
+                room.current_player_index = (room.current_player_index + 1) % len(room.player_order)
+                next_player = room.player_order[room.current_player_index]
+            await sio.emit('next_player', {
+                'player': room.players[next_player].name,
+                'skipped_disconnected': True
+            }, room=room_id)
+            start_round_timer(room, _get_drawing_time_limit(room.active_count), whispers_turn_expired)
+
+        # Broadcast updated players
+        updated_list = [player.summary() for player in room.active_players()]
+        await sio.emit('player_left', {
+            'players': updated_list,
+            'disconnected_player': disc_name
+        }, room=room_id)
+
+        await sync_state(room)
+
+    @sio.event
+    async def recover_state(sid, data: RecoverState):
+        """
+        Reattach a reconnecting player to their old seat and send only what
+        changed since the last state version they saw (or a full snapshot if
+        they have fallen too far behind).
+        """
+        try:
+            room_id = data.room_id
+            old_sid = data.client_id
+            room = rooms.get(room_id)
+
+            player = room.players.get(old_sid) if room is not None else None
+            if (player is None or player.is_host or player.name != data.player_name
+                    or not secrets.compare_digest(player.reconnect_token, data.reconnect_token)):
+                await sio.emit('join_error', {
+                    'message': 'Could not restore your session. Please rejoin.'
+                }, room=sid)
+                return
+            # Never detach a live socket; the client retries once the old one drops
+            if player.connected:
+                await sio.emit('join_error', {
+                    'message': 'Your previous connection is still active. Please try again in a moment.'
+                }, room=sid)
+                return
+
+            room.rebind_player(old_sid, sid)
+            # A used token is spent; the new one only goes to this socket
+            player.reconnect_token = secrets.token_urlsafe(24)
+            sid_rooms[sid] = room_id
+            await sio.enter_room(sid, room_id)
+
+            await sync_state(room, skip_sid=sid)
+            recovered = room.get_state_since(data.version)
+            recovered['reconnect_token'] = player.reconnect_token
+            await sio.emit('state_recovered', recovered, room=sid)
+            logger.info("Player %s recovered session in room %s", player.name, room_id, extra={'event': 'state_recovered'})
+
+        except Exception as e:
+            logger.warning("Error in recover_state: %s", e, extra={'event': 'handler_error'})
+            await sio.emit('join_error', {'message': str(e)}, room=sid)
+
+    def resume_round(room_id: str) -> None:
+        room = rooms.get(room_id)
+        if room is None or room.game_state != 'playing':
+            return
+        # The current turn or question starts over with a full time limit
+        room.state_lock = False
+        room.round_start_time = room.clock.now()
+        if room.current_game == 'trivia':
+            start_round_timer(room, _get_trivia_time_limit(room.active_count), trivia_question_expired)
+        elif room.current_game == 'chinese_whispers':
+            start_round_timer(room, _get_drawing_time_limit(room.active_count), whispers_turn_expired)
+        logger.info("Resumed round %s of %s in recovered room %s", room.round, room.current_game, room_id,
+                    extra={'event': 'round_resumed'})
+
+    return resume_round
+
+# Helper methods for time-limits (cached: one entry per player count)
+@lru_cache(maxsize=64)
 def _get_drawing_time_limit(player_count: int) -> int:
     if player_count <= 3:
         return GAME_CONFIG['time_limits']['drawing']['2-3']
@@ -611,6 +828,7 @@ def _get_drawing_time_limit(player_count: int) -> int:
     else:
         return GAME_CONFIG['time_limits']['drawing']['7+']
 
+@lru_cache(maxsize=64)
 def _get_trivia_time_limit(player_count: int) -> int:
     if player_count <= 3:
         return GAME_CONFIG['time_limits']['trivia']['2-3']
@@ -619,6 +837,7 @@ def _get_trivia_time_limit(player_count: int) -> int:
     else:
         return GAME_CONFIG['time_limits']['trivia']['7+']
 
+@lru_cache(maxsize=64)
 def _get_chase_time_limit(player_count: int) -> int:
     if player_count == 2:
         return GAME_CONFIG['time_limits']['chase']['2']
@@ -629,5 +848,5 @@ def _highest_scorer_name(room: GameRoom) -> str:
     # Return the name of the highest-scoring player (excluding host)
     if not room.scores:
         return "Nobody"
-    top_player_id = max(room.scores, key=room.scores.get)
-    return room.players[top_player_id]['name']
+    top_player_id, _ = room.scores.top(1)[0]
+    return room.players[top_player_id].name
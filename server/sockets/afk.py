@@ -0,0 +1,157 @@
+"""Per-player AFK detection driven by an expiry heap."""
+import heapq
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import socketio
+
+from ..config.game_config import GAME_CONFIG
+from ..models.game_room import GameRoom
+from ..utils.log import get_logger
+
+logger = get_logger('sockets')
+
+# Lifecycle events aren't player activity
+PASSIVE_EVENTS = ('connect', 'disconnect')
+# Events after which everyone's idle time restarts
+GAME_START_EVENTS = ('start_game',)
+
+
+class AfkTracker:
+    """Warns, then disconnects, players who stop sending events mid-game.
+
+    Each player's last activity is the monotonic `PlayerState.last_action`;
+    recording activity is one attribute write. The heap holds at most one
+    deadline per player and is never updated on activity. When a deadline
+    comes up, the player's real deadline is worked out from `last_action`:
+    if they have been active since, the entry is simply pushed back, otherwise
+    they are warned (and later kicked). A sweep therefore costs O(expired log N)
+    however many players are connected.
+
+    Idle time only counts while the game is waiting on the player
+    (`GameRoom.awaiting_action`) and starts no earlier than the current turn
+    or question (`GameRoom.turn_start_time`). Waiting for your turn in
+    Chinese Whispers, or for the next question after answering, is not
+    idling; such players are looked at again every `recheck_after` seconds.
+    """
+
+    def __init__(self, rooms: Dict[str, GameRoom], warn_after: Optional[float] = None,
+                 kick_after: Optional[float] = None, clock: Callable[[], float] = time.monotonic,
+                 recheck_after: Optional[float] = None):
+        self.rooms = rooms
+        self.warn_after = warn_after if warn_after is not None else GAME_CONFIG['idle_timeout']
+        self.kick_after = kick_after if kick_after is not None else GAME_CONFIG['afk_kick_timeout']
+        self.clock = clock
+        # Bounds how late a warning can be once a waiting player's turn starts
+        self.recheck_after = recheck_after if recheck_after is not None else self.warn_after / 4
+        self._heap: List[Tuple[float, str, str]] = []  # (deadline, sid, room_id)
+        self._armed: Set[str] = set()  # sids with an entry in the heap
+        self.warned = 0
+        self.kicked = 0
+
+    def _arm(self, sid: str, room_id: str, deadline: float) -> None:
+        self._armed.add(sid)
+        heapq.heappush(self._heap, (deadline, sid, room_id))
+
+    def touch(self, sid: str, room_id: Optional[str]) -> None:
+        """Record activity from `sid`."""
+        room = self.rooms.get(room_id) if room_id is not None else None
+        player = room.players.get(sid) if room is not None else None
+        if player is None or player.is_host:
+            return
+        player.last_action = self.clock()
+        if room.afk_warnings.get(sid):
+            room.afk_warnings[sid] = False
+        if sid not in self._armed:
+            self._arm(sid, room_id, player.last_action + self.warn_after)
+
+    def restart_room(self, room_id: Optional[str]) -> None:
+        """Restart the idle clock of everyone in a room, e.g. when a game starts."""
+        room = self.rooms.get(room_id) if room_id is not None else None
+        if room is not None and room.game_state == 'playing':
+            room.mark_all_active(self.clock())
+
+    def expire(self) -> List[Tuple[str, str, str]]:
+        """Pop every passed deadline; returns `(action, room_id, sid)` with action 'warn' or 'kick'."""
+        now = self.clock()
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, sid, room_id = heapq.heappop(heap)
+            self._armed.discard(sid)
+            room = self.rooms.get(room_id)
+            player = room.players.get(sid) if room is not None else None
+            if player is None or not player.connected:
+                continue  # Left, or moved to a new sid; touch() re-arms them
+
+            if room.game_state != 'playing':
+                # Idling in the lobby is fine; check again later
+                self._arm(sid, room_id, now + self.warn_after)
+                continue
+            if not room.awaiting_action(sid):
+                # Waiting on other players; check again once it may be their turn
+                self._arm(sid, room_id, now + self.recheck_after)
+                continue
+
+            since = max(player.last_action, room.turn_start_time or player.last_action)
+            idle = now - since
+            if idle >= self.kick_after:
+                due.append(('kick', room_id, sid))
+            elif idle >= self.warn_after:
+                if not room.afk_warnings.get(sid):
+                    room.afk_warnings[sid] = True
+                    due.append(('warn', room_id, sid))
+                self._arm(sid, room_id, since + self.kick_after)
+            else:
+                self._arm(sid, room_id, since + self.warn_after)
+        return due
+
+    async def sweep(self, sio: socketio.AsyncServer) -> None:
+        """Warn and kick the players whose idle deadlines have passed."""
+        for action, room_id, sid in self.expire():
+            room = self.rooms.get(room_id)
+            if room is None or sid not in room.players:
+                continue
+            name = room.players[sid].name
+            if action == 'warn':
+                self.warned += 1
+                await sio.emit('afk_warning', {
+                    'seconds_left': self.kick_after - self.warn_after
+                }, room=sid)
+                await sio.emit('player_afk', {'player': name}, room=room_id)
+            else:
+                self.kicked += 1
+                logger.info("Disconnecting AFK player %s from room %s", name, room_id,
+                            extra={'event': 'afk_kicked'})
+                await sio.emit('afk_kicked', {
+                    'message': 'You were disconnected for being inactive'
+                }, room=sid)
+                # The disconnect handler marks the seat as disconnected
+                await sio.disconnect(sid)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'tracked_players': len(self._armed),
+            'warned': self.warned,
+            'kicked': self.kicked
+        }
+
+    def install(self, sio: socketio.AsyncServer, sid_rooms: Dict[str, str]) -> None:
+        """Wrap every registered event handler so each event counts as activity."""
+        handlers = sio.handlers['/']
+        for event, handler in list(handlers.items()):
+            if event not in PASSIVE_EVENTS:
+                handlers[event] = self._tracked(event, handler, sid_rooms)
+
+    def _tracked(self, event: str, handler, sid_rooms: Dict[str, str]):
+        restarts = event in GAME_START_EVENTS
+
+        async def tracked(sid, *args):
+            result = await handler(sid, *args)
+            # After the handler, so a join is tracked from its first event
+            room_id = sid_rooms.get(sid)
+            if restarts:
+                self.restart_room(room_id)
+            self.touch(sid, room_id)
+            return result
+        return tracked
@@ -0,0 +1,122 @@
+"""Per-connection and per-room token-bucket limits for socket events."""
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+import socketio
+
+from ..config.game_config import GAME_CONFIG
+from ..utils.log import get_logger
+
+logger = get_logger('sockets')
+
+# Lifecycle events are never limited
+UNLIMITED_EVENTS = ('connect', 'disconnect')
+
+
+class TokenBucket:
+    """Classic token bucket refilled lazily on each take."""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if tokens < 1:
+            self.tokens = tokens
+            return False
+        self.tokens = tokens - 1
+        return True
+
+
+class EventRateLimiter:
+    """Token buckets per (sid, event) and per (room, event).
+
+    Each check is a couple of dict lookups and one bucket refill, so the cost
+    per event is O(1). Over-budget events are dropped and counted; the counters
+    are exposed through `stats()`.
+    """
+
+    def __init__(self, sid_limits: Optional[Dict[str, Dict[str, float]]] = None,
+                 room_limits: Optional[Dict[str, Dict[str, float]]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        config = GAME_CONFIG['rate_limits']
+        self.sid_limits = sid_limits if sid_limits is not None else config['per_sid']
+        self.room_limits = room_limits if room_limits is not None else config['per_room']
+        self.clock = clock
+        self.sid_buckets: Dict[str, Dict[str, TokenBucket]] = {}
+        self.room_buckets: Dict[str, Dict[str, TokenBucket]] = {}
+        self.allowed: Counter = Counter()
+        self.dropped: Counter = Counter()
+
+    @staticmethod
+    def _take(buckets: Dict[str, Dict[str, TokenBucket]], key: str, event: str,
+              limits: Dict[str, Dict[str, float]], now: float) -> bool:
+        spec = limits.get(event) or limits.get('default')
+        if not spec:
+            return True
+        owner = buckets.get(key)
+        if owner is None:
+            owner = buckets[key] = {}
+        bucket = owner.get(event)
+        if bucket is None:
+            bucket = owner[event] = TokenBucket(spec['rate'], spec['burst'], now)
+        return bucket.take(now)
+
+    def allow(self, event: str, sid: str, room_id: Optional[str] = None) -> bool:
+        """Spend one token for `event` from the sid's and the room's budgets."""
+        now = self.clock()
+        if not self._take(self.sid_buckets, sid, event, self.sid_limits, now) or (
+                room_id is not None and
+                not self._take(self.room_buckets, room_id, event, self.room_limits, now)):
+            self.dropped[event] += 1
+            return False
+        self.allowed[event] += 1
+        return True
+
+    def forget_sid(self, sid: str) -> None:
+        self.sid_buckets.pop(sid, None)
+
+    def forget_room(self, room_id: str) -> None:
+        self.room_buckets.pop(room_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'allowed': dict(self.allowed),
+            'dropped': dict(self.dropped),
+            'tracked_sids': len(self.sid_buckets),
+            'tracked_rooms': len(self.room_buckets)
+        }
+
+    def install(self, sio: socketio.AsyncServer, sid_rooms: Dict[str, str]) -> None:
+        """Wrap every registered event handler with the limiter."""
+        handlers = sio.handlers['/']
+        for event, handler in list(handlers.items()):
+            if event == 'disconnect':
+                handlers[event] = self._releasing(handler)
+            elif event not in UNLIMITED_EVENTS:
+                handlers[event] = self._limited(event, handler, sid_rooms)
+
+    def _limited(self, event: str, handler, sid_rooms: Dict[str, str]):
+        async def limited(sid, *args):
+            if not self.allow(event, sid, sid_rooms.get(sid)):
+                if self.dropped[event] % 100 == 1:
+                    logger.warning("Rate limit hit for %s from %s", event, sid,
+                                   extra={'event': 'rate_limited', 'dropped': self.dropped[event]})
+                return None
+            return await handler(sid, *args)
+        return limited
+
+    def _releasing(self, handler):
+        async def releasing(sid, *args):
+            try:
+                return await handler(sid, *args)
+            finally:
+                self.forget_sid(sid)
+        return releasing
@@ -0,0 +1,249 @@
+"""Typed schemas for inbound socket event payloads.
+
+Each event that takes a payload has a dataclass describing it. When this
+module is imported every schema is compiled into a flat list of per-field
+checks, so decoding a payload is one pass over the fields with exact type
+tests; no reflection happens per event. Handlers receive the
+decoded object instead of the raw dict, and malformed payloads are rejected
+(and counted per event) before they reach game logic.
+
+Unknown keys are ignored, so clients may keep sending extra fields such as
+`room_id` on in-room events.
+"""
+import math
+from collections import Counter
+from dataclasses import MISSING, dataclass, field, fields
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple, Union, get_args, get_origin, get_type_hints
+
+import socketio
+
+from ..config.game_config import GAME_CONFIG
+from ..utils.log import get_logger
+
+logger = get_logger('sockets')
+
+LIMITS = GAME_CONFIG['payload_limits']
+GAME_TYPES = tuple(GAME_CONFIG['game_modes'])
+
+
+class SchemaError(ValueError):
+    """Raised when a payload does not match its event schema."""
+    pass
+
+
+def length(max_length: int, min_length: int = 0) -> Dict[str, int]:
+    """Field metadata bounding the length of a string field."""
+    return {'max_length': max_length, 'min_length': min_length}
+
+
+@dataclass(slots=True)
+class JoinRoom:
+    room_id: str = field(metadata=length(LIMITS['room_id'], 1))
+    is_host: bool = False
+    player_name: str = field(default='', metadata=length(LIMITS['player_name']))
+    profile_picture: Optional[str] = field(default=None, metadata=length(LIMITS['image']))
+
+
+@dataclass(slots=True)
+class StartGame:
+    game_type: Literal[GAME_TYPES]
+
+
+@dataclass(slots=True)
+class SubmitDrawing:
+    drawing: str = field(metadata=length(LIMITS['image'], 1))
+
+
+@dataclass(slots=True)
+class DrawingUpdate:
+    type: Literal['line', 'clear'] = 'line'
+    x1: float = 0.0
+    y1: float = 0.0
+    x2: float = 0.0
+    y2: float = 0.0
+    color: str = field(default='#000000', metadata=length(32))
+    width: float = 1.0
+    tool: Literal['brush', 'eraser'] = 'brush'
+
+    def segment(self) -> Dict[str, Any]:
+        """The segment dict queued on the stroke relay."""
+        if self.type == 'clear':
+            return {'type': 'clear'}
+        return {
+            'type': 'line', 'x1': self.x1, 'y1': self.y1, 'x2': self.x2, 'y2': self.y2,
+            'color': self.color, 'width': self.width, 'tool': self.tool
+        }
+
+
+@dataclass(slots=True)
+class SubmitGuess:
+    guess: str = field(metadata=length(LIMITS['text'], 1))
+
+
+@dataclass(slots=True)
+class SubmitAnswer:
+    answer: str = field(metadata=length(LIMITS['text']))
+    answer_time: Optional[float] = None
+
+
+@dataclass(slots=True)
+class RecoverState:
+    room_id: str = field(metadata=length(LIMITS['room_id'], 1))
+    client_id: str = field(metadata=length(64, 1))
+    player_name: str = field(metadata=length(LIMITS['player_name'], 1))
+    reconnect_token: str = field(metadata=length(64, 1))
+    version: Optional[int] = None
+
+
+EVENT_SCHEMAS: Dict[str, type] = {
+    'join_room': JoinRoom,
+    'start_game': StartGame,
+    'submit_drawing': SubmitDrawing,
+    'drawing_update': DrawingUpdate,
+    'submit_guess': SubmitGuess,
+    'submit_answer': SubmitAnswer,
+    'recover_state': RecoverState
+}
+# Events whose sender is waiting on a reply; a rejected payload is reported back
+ERROR_EVENTS: Dict[str, str] = {
+    'join_room': 'join_error',
+    'recover_state': 'join_error'
+}
+
+
+# ---------------------------------------------------------------------------
+# Compilation
+# ---------------------------------------------------------------------------
+
+Check = Callable[[Any], Any]
+
+
+def _compile_type(hint: Any, metadata: Dict[str, Any]) -> Check:
+    """Build a check for one annotated type; returns the (possibly coerced) value."""
+    origin = get_origin(hint)
+
+    if origin is Union:
+        args = [arg for arg in get_args(hint) if arg is not type(None)]
+        inner = _compile_type(args[0], metadata)
+
+        def check_optional(value):
+            return None if value is None else inner(value)
+        return check_optional
+
+    if origin is Literal:
+        choices = frozenset(get_args(hint))
+
+        def check_choice(value):
+            if value.__class__ is str and value in choices:
+                return value
+            raise SchemaError(f"expected one of {sorted(choices)}")
+        return check_choice
+
+    if hint is str:
+        max_length = metadata.get('max_length')
+        min_length = metadata.get('min_length', 0)
+
+        def check_str(value):
+            if value.__class__ is not str:
+                raise SchemaError("expected a string")
+            if max_length is not None and not min_length <= len(value) <= max_length:
+                raise SchemaError(f"length must be {min_length}..{max_length}")
+            return value
+        return check_str
+
+    if hint is bool:
+        def check_bool(value):
+            if value is True or value is False:
+                return value
+            raise SchemaError("expected a boolean")
+        return check_bool
+
+    if hint is int:
+        def check_int(value):
+            if value.__class__ is int:
+                return value
+            raise SchemaError("expected an integer")
+        return check_int
+
+    if hint is float:
+        def check_float(value):
+            cls = value.__class__
+            if cls is float:
+                if not math.isfinite(value):
+                    raise SchemaError("expected a finite number")
+                return value
+            if cls is int:
+                return float(value)
+            raise SchemaError("expected a number")
+        return check_float
+
+    raise TypeError(f"Unsupported schema type: {hint!r}")
+
+
+def compile_schema(schema: type) -> Callable[[Any], Any]:
+    """Compile a schema dataclass into a decoder for raw payloads."""
+    hints = get_type_hints(schema)
+    plan: List[Tuple[str, bool, Any, Check]] = []
+    for f in fields(schema):
+        required = f.default is MISSING and f.default_factory is MISSING
+        default = f.default if f.default is not MISSING else MISSING
+        plan.append((f.name, required, default, _compile_type(hints[f.name], f.metadata)))
+
+    def decode(data: Any) -> Any:
+        if data.__class__ is not dict:
+            raise SchemaError("payload must be an object")
+        obj = object.__new__(schema)
+        for name, required, default, check in plan:
+            value = data.get(name, MISSING)
+            if value is MISSING:
+                if required:
+                    raise SchemaError(f"missing field '{name}'")
+                value = default
+            else:
+                try:
+                    value = check(value)
+                except SchemaError as e:
+                    raise SchemaError(f"field '{name}': {e}") from None
+            setattr(obj, name, value)
+        return obj
+
+    return decode
+
+
+DECODERS: Dict[str, Callable[[Any], Any]] = {
+    event: compile_schema(schema) for event, schema in EVENT_SCHEMAS.items()
+}
+
+
+class EventValidator:
+    """Decode inbound payloads with the compiled schemas and count rejects."""
+
+    def __init__(self, decoders: Optional[Dict[str, Callable[[Any], Any]]] = None):
+        self.decoders = decoders if decoders is not None else DECODERS
+        self.rejected: Counter = Counter()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'rejected': dict(self.rejected)}
+
+    def install(self, sio: socketio.AsyncServer) -> None:
+        """Wrap each registered handler that has a schema."""
+        handlers = sio.handlers['/']
+        for event, decode in self.decoders.items():
+            if event in handlers:
+                handlers[event] = self._validated(sio, event, decode, handlers[event])
+
+    def _validated(self, sio: socketio.AsyncServer, event: str, decode: Callable[[Any], Any], handler):
+        error_event = ERROR_EVENTS.get(event)
+
+        async def validated(sid, data=None, *args):
+            try:
+                payload = decode(data)
+            except SchemaError as e:
+                self.rejected[event] += 1
+                logger.info("Rejected %s from %s: %s", event, sid, e,
+                            extra={'event': 'payload_rejected', 'rejected': self.rejected[event]})
+                if error_event is not None:
+                    await sio.emit(error_event, {'message': f"Invalid request: {e}"}, room=sid)
+                return None
+            return await handler(sid, payload, *args)
+        return validated
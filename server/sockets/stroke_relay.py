@@ -0,0 +1,73 @@
+"""Live drawing relay that coalesces stroke segments per room."""
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Sequence
+
+import socketio
+
+from ..config.game_config import GAME_CONFIG
+from ..utils.log import get_logger
+from ..utils.stroke_codec import encode_segments
+
+logger = get_logger('relay')
+
+
+class StrokeRelay:
+    """Buffer `drawing_update` segments and fan them out at a fixed tick rate.
+
+    Segments are grouped per room and per drawer. Every tick each drawer's
+    pending segments go out as a single binary `drawing_batch` frame (see
+    `server.utils.stroke_codec`) to the rest of the room, so the number of emits per tick is bounded by the number of
+    active drawers rather than by how fast they move the pointer.
+    """
+
+    def __init__(self, sio: socketio.AsyncServer, tick_rate: Optional[int] = None,
+                 max_pending: Optional[int] = None):
+        config = GAME_CONFIG['stroke_relay']
+        self.sio = sio
+        self.interval = 1.0 / (tick_rate or config['tick_rate'])
+        self.max_pending = max_pending or config['max_pending_segments']
+        self.pending: Dict[str, Dict[str, Deque[Dict[str, Any]]]] = {}  # {room_id: {sid: deque of segments}}
+        self.palettes: Dict[str, Sequence[str]] = {}  # {room_id: palette used to encode colors}
+        self._task = None
+
+    def push(self, room_id: str, sid: str, segment: Dict[str, Any], palette: Sequence[str]) -> None:
+        """Queue a segment for the next tick, starting the flush loop if idle."""
+        self.palettes[room_id] = palette
+        drawers = self.pending.setdefault(room_id, {})
+        segments = drawers.get(sid)
+        if segments is None:
+            # Bounded so a drawer outpacing the tick rate drops its oldest segments
+            segments = drawers[sid] = deque(maxlen=self.max_pending)
+        if segment.get('type') == 'clear':
+            # A clear wipes everything queued before it
+            segments.clear()
+        segments.append(segment)
+
+        if self._task is None:
+            self._task = self.sio.start_background_task(self._run)
+
+    def discard_room(self, room_id: str) -> None:
+        """Forget any segments still queued for a room."""
+        self.pending.pop(room_id, None)
+        self.palettes.pop(room_id, None)
+
+    async def flush(self) -> None:
+        """Emit one batched frame per drawer with everything queued so far."""
+        pending, self.pending = self.pending, {}
+        for room_id, drawers in pending.items():
+            palette = self.palettes.get(room_id, ())
+            for sid, segments in drawers.items():
+                # Raw bytes go out as a Socket.IO binary attachment
+                await self.sio.emit('drawing_batch', encode_segments(segments, palette),
+                                    room=room_id, skip_sid=sid)
+
+    async def _run(self) -> None:
+        try:
+            while self.pending:
+                await self.sio.sleep(self.interval)
+                await self.flush()
+        except Exception as e:
+            logger.warning("Error in stroke relay: %s", e, extra={'event': 'relay_error'})
+            self.pending = {}
+        finally:
+            self._task = None
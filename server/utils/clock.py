@@ -0,0 +1,74 @@
+"""Time source for game logic.
+
+Game code measures durations (round timers, answer times, idle time) with a
+`Clock` rather than `datetime.now()`: readings are monotonic seconds from
+`time.monotonic_ns`, so they never jump with the wall clock and subtracting
+two of them is exact float arithmetic. `wall()` converts a reading to an epoch
+timestamp for the few values clients display.
+
+`SimulatedClock` only moves when told to, so tests and simulations can play
+through rounds without waiting; install it with `set_clock` before rooms are
+created, or pass it to `GameRoom` directly.
+"""
+import asyncio
+import time
+
+_NS = 1_000_000_000
+
+
+class Clock:
+    """The real monotonic clock."""
+
+    def now_ns(self) -> int:
+        return time.monotonic_ns()
+
+    def now(self) -> float:
+        """Monotonic seconds; only differences between readings are meaningful."""
+        return self.now_ns() / _NS
+
+    def elapsed(self, since: float) -> float:
+        """Seconds since an earlier `now()` reading."""
+        return self.now() - since
+
+    def wall(self, reading: float) -> float:
+        """Epoch seconds at which `now()` returned `reading`."""
+        return time.time() - self.elapsed(reading)
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+
+class SimulatedClock(Clock):
+    """A clock that only advances when `advance()` (or `sleep()`) is called."""
+
+    def __init__(self, start: float = 0.0, epoch: float = 1_700_000_000.0):
+        self._now_ns = int(start * _NS)
+        self.epoch = epoch  # Wall time at reading 0
+
+    def now_ns(self) -> int:
+        return self._now_ns
+
+    def advance(self, seconds: float) -> None:
+        self._now_ns += int(round(seconds * _NS))
+
+    def wall(self, reading: float) -> float:
+        return self.epoch + reading
+
+    async def sleep(self, seconds: float) -> None:
+        # Jump ahead, but still give other tasks a turn
+        self.advance(seconds)
+        await asyncio.sleep(0)
+
+
+_clock: Clock = Clock()
+
+
+def get_clock() -> Clock:
+    """The process-wide clock used by default."""
+    return _clock
+
+
+def set_clock(clock: Clock) -> None:
+    """Replace the process-wide clock (e.g. with a `SimulatedClock`)."""
+    global _clock
+    _clock = clock
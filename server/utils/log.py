@@ -0,0 +1,154 @@
+"""Non-blocking, sampled, structured logging.
+
+Records are filtered and sampled on the calling thread, then handed to a
+bounded queue; a background listener thread does the formatting and the
+actual write. The event loop never blocks on stdout, and if the writer falls
+behind new records are dropped (and counted) instead of piling up.
+
+Handlers log with a stable `event` name so sampling and rate limits can be
+tuned per event in LOGGING_CONFIG:
+
+    logger = get_logger('sockets')
+    logger.info("Player %s joined room %s", name, room_id, extra={'event': 'player_joined'})
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from typing import Any, Dict, Optional
+
+from server.config.logging_config import LOGGING_CONFIG
+
+ROOT_LOGGER = 'party_games'
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def get_logger(subsystem: str) -> logging.Logger:
+    """Get the logger for a subsystem (e.g. 'sockets', 'routes')."""
+    return logging.getLogger(f'{ROOT_LOGGER}.{subsystem}')
+
+
+class JsonFormatter(logging.Formatter):
+    """Format a record as a single JSON line, including `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage()
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Per-event sampling plus a token-bucket rate limit.
+
+    Records are keyed by their `event` extra (or the unformatted message).
+    Records dropped by the rate limit are counted and reported as
+    `suppressed` on the next record that gets through for that event.
+    """
+
+    def __init__(self, sampling: Dict[str, float], rate_limits: Dict[str, Dict[str, float]]):
+        super().__init__()
+        self.sampling = sampling
+        self.rate_limits = rate_limits
+        self.buckets: Dict[str, list] = {}  # {event: [tokens, last_refill, suppressed]}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+
+        event = getattr(record, 'event', None) or str(record.msg)
+        rate = self.sampling.get(event)
+        if rate is not None and random.random() >= rate:
+            return False
+
+        limit = self.rate_limits.get(event) or self.rate_limits.get('default')
+        if not limit:
+            return True
+
+        now = time.monotonic()
+        bucket = self.buckets.get(event)
+        if bucket is None:
+            bucket = self.buckets[event] = [limit['burst'], now, 0]
+        else:
+            bucket[0] = min(limit['burst'], bucket[0] + (now - bucket[1]) * limit['rate'])
+            bucket[1] = now
+
+        if bucket[0] < 1:
+            bucket[2] += 1
+            return False
+        bucket[0] -= 1
+        if bucket[2]:
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve %-args now (they may be mutated later); JSON encoding and the
+        # write itself happen on the listener thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(config: Optional[Dict[str, Any]] = None) -> None:
+    """Install the queue-backed handler on the party_games logger (idempotent)."""
+    global _listener
+    if _listener is not None:
+        return
+    config = config or LOGGING_CONFIG
+
+    output = logging.StreamHandler(sys.stdout)
+    if config['json']:
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=config['queue_size']))
+    handler.addFilter(SamplingFilter(config['sampling'], config['rate_limits']))
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(config['level'])
+    root.addHandler(handler)
+    root.propagate = False
+    for subsystem, level in config['subsystems'].items():
+        get_logger(subsystem).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
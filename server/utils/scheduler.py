@@ -0,0 +1,133 @@
+"""One event-loop timer service for every room's deadlines.
+
+Rooms don't get a task or a sleep each. Every deadline (round and turn time
+limits, the pause between rounds, ...) goes into one heap, and a single loop
+sleeps until the earliest one and runs its callback. Timers are named per
+room, so scheduling a name again replaces the old timer and a room's timers
+can be dropped together.
+
+The clock is injectable. Tests can build the scheduler with a fake clock and
+`autostart=False`, advance the clock and call `run_due()` themselves.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from server.utils.log import get_logger
+
+logger = get_logger('scheduler')
+
+
+class Timer:
+    """Handle for a scheduled callback."""
+
+    __slots__ = ('room_id', 'name', 'deadline', 'callback', 'args', 'cancelled')
+
+    def __init__(self, room_id: str, name: str, deadline: float,
+                 callback: Callable[..., Awaitable[Any]], args: Tuple[Any, ...]):
+        self.room_id = room_id
+        self.name = name
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+
+class RoundScheduler:
+    """Heap of per-room timers driven by a single asyncio task."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, autostart: bool = True):
+        self.clock = clock
+        self.autostart = autostart
+        self._heap: List[Tuple[float, int, Timer]] = []
+        self._seq = itertools.count()
+        self._timers: Dict[str, Dict[str, Timer]] = {}  # {room_id: {name: timer}}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def schedule(self, room_id: str, name: str, delay: float,
+                 callback: Callable[..., Awaitable[Any]], *args: Any) -> Timer:
+        """Run `await callback(*args)` in `delay` seconds, replacing `name`'s timer."""
+        self.cancel(room_id, name)
+        timer = Timer(room_id, name, self.clock() + delay, callback, args)
+        self._timers.setdefault(room_id, {})[name] = timer
+        is_earliest = not self._heap or timer.deadline < self._heap[0][0]
+        heapq.heappush(self._heap, (timer.deadline, next(self._seq), timer))
+
+        if self.autostart:
+            self._ensure_running()
+            if is_earliest:
+                self._wakeup.set()
+        return timer
+
+    def cancel(self, room_id: str, name: str) -> bool:
+        """Cancel a room's named timer; returns whether one was pending."""
+        timer = self._timers.get(room_id, {}).get(name)
+        if timer is None:
+            return False
+        # Left in the heap and skipped when it comes due
+        timer.cancelled = True
+        self._forget(timer)
+        return True
+
+    def _forget(self, timer: Timer) -> None:
+        timers = self._timers.get(timer.room_id)
+        if timers is not None and timers.get(timer.name) is timer:
+            del timers[timer.name]
+            if not timers:
+                del self._timers[timer.room_id]
+
+    def cancel_room(self, room_id: str) -> None:
+        """Cancel every timer a room has."""
+        for timer in self._timers.pop(room_id, {}).values():
+            timer.cancelled = True
+
+    def remaining(self, room_id: str, name: str) -> Optional[float]:
+        """Seconds until a named timer fires, or None if it isn't pending."""
+        timer = self._timers.get(room_id, {}).get(name)
+        return None if timer is None else max(0.0, timer.deadline - self.clock())
+
+    def pending(self) -> int:
+        return sum(len(timers) for timers in self._timers.values())
+
+    async def run_due(self) -> int:
+        """Fire every timer whose deadline has passed; returns how many ran."""
+        fired = 0
+        now = self.clock()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, timer = heapq.heappop(self._heap)
+            if timer.cancelled:
+                continue
+            self._forget(timer)
+            fired += 1
+            try:
+                await timer.callback(*timer.args)
+            except Exception as e:
+                logger.exception("Timer %s for room %s failed: %s", timer.name, timer.room_id, e,
+                                 extra={'event': 'timer_failed'})
+        # Drop cancelled timers at the top so the next sleep is accurate
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+        return fired
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            timeout = max(0.0, self._heap[0][0] - self.clock()) if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            await self.run_due()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
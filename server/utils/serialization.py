@@ -0,0 +1,91 @@
+"""JSON serialization shared by Socket.IO and the HTTP API.
+
+Uses orjson when it is installed, then msgspec, and otherwise the stdlib
+`json` module. Every backend encodes the same values the same way:
+datetimes and dates as ISO 8601 strings (as stored in `room.drawings`),
+sets and tuples as lists, and non-string dict keys as strings.
+
+The module itself satisfies python-socketio's `json=` interface
+(`dumps`/`loads`), and `FastJSONResponse` is the FastAPI response class:
+
+    sio = socketio.AsyncServer(json=serialization, ...)
+    app = FastAPI(default_response_class=serialization.FastJSONResponse)
+"""
+import dataclasses
+import json as _stdlib_json
+from datetime import date, datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _default(obj: Any) -> Any:
+    """Encode the types the backends don't handle natively."""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    # orjson and msgspec encode dataclasses themselves; match them on stdlib json
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    BACKEND = 'orjson'
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+
+    _loads = orjson.loads
+
+elif msgspec is not None:
+    BACKEND = 'msgspec'
+    _encoder = msgspec.json.Encoder(enc_hook=_default)
+    _decoder = msgspec.json.Decoder()
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return _encoder.encode(obj)
+
+    _loads = _decoder.decode
+
+else:
+    BACKEND = 'json'
+    _stdlib_encoder = _stdlib_json.JSONEncoder(default=_default, separators=(',', ':'), ensure_ascii=False)
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return _stdlib_encoder.encode(obj).encode('utf-8')
+
+    _loads = _stdlib_json.loads
+
+
+def dumps(obj: Any, **kwargs: Any) -> str:
+    """Encode `obj` as compact JSON text.
+
+    Keyword arguments (python-socketio passes `separators`) are accepted for
+    compatibility with `json.dumps`; output is always compact.
+    """
+    return dumps_bytes(obj).decode('utf-8')
+
+
+def loads(data: Any, **kwargs: Any) -> Any:
+    """Decode JSON from `str` or `bytes`."""
+    return _loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the module's fastest available backend."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
@@ -0,0 +1,111 @@
+"""Compact binary encoding for live drawing strokes.
+
+A frame is a version byte followed by runs. Consecutive segments that share
+a tool, color and width are grouped under one run header, and each segment
+then costs four 16-bit coordinates:
+
+    frame := version:u8 run*
+    run   := RUN_LINE tool:u8 color:u8 width:u8 count:u16 [r:u8 g:u8 b:u8] (x1 y1 x2 y2):u16 * count
+           | RUN_CLEAR
+
+`color` indexes the room palette (`drawing_state['tools']['colors']`); colors
+outside the palette use CUSTOM_COLOR followed by an RGB triple. Coordinates are
+canvas fractions quantized to 0..COORD_SCALE. All integers are little-endian.
+"""
+import struct
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+FORMAT_VERSION = 1
+COORD_SCALE = 0xFFFF
+MAX_RUN_LENGTH = 0xFFFF
+
+RUN_LINE = 0
+RUN_CLEAR = 1
+
+TOOLS = ('brush', 'eraser')
+CUSTOM_COLOR = 0xFF
+
+_VERSION = struct.Struct('<B')
+_LINE_RUN = struct.Struct('<BBBBH')  # kind, tool, color, width, count
+_RGB = struct.Struct('<BBB')
+_COORDS = struct.Struct('<HHHH')
+
+
+@lru_cache(maxsize=32)
+def _palette_index(palette: Tuple[str, ...]) -> Dict[str, int]:
+    return {color.lower(): idx for idx, color in enumerate(palette)}
+
+
+def _parse_rgb(color: Any) -> Tuple[int, int, int]:
+    try:
+        value = int(str(color).lstrip('#')[:6], 16)
+    except ValueError:
+        return (0, 0, 0)
+    return ((value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF)
+
+
+def _quantize(value: Any) -> int:
+    value = float(value)
+    if value <= 0.0:
+        return 0
+    if value >= 1.0:
+        return COORD_SCALE
+    return int(value * COORD_SCALE + 0.5)
+
+
+def encode_segments(segments: Iterable[Dict[str, Any]], palette: Sequence[str]) -> bytes:
+    """Encode `drawing_update` segments into a single binary frame.
+
+    Malformed segments are skipped rather than failing the whole frame.
+    """
+    index = _palette_index(tuple(palette))
+    out = bytearray(_VERSION.pack(FORMAT_VERSION))
+
+    run_key: Optional[Tuple[int, int, int, Optional[Tuple[int, int, int]]]] = None
+    run_header_at = 0
+    run_count = 0
+
+    for segment in segments:
+        if segment.get('type') == 'clear':
+            if run_key is not None:
+                _LINE_RUN.pack_into(out, run_header_at, RUN_LINE, *run_key[:3], run_count)
+                run_key = None
+            out.append(RUN_CLEAR)
+            continue
+
+        try:
+            coords = _COORDS.pack(
+                _quantize(segment['x1']), _quantize(segment['y1']),
+                _quantize(segment['x2']), _quantize(segment['y2'])
+            )
+            width = min(max(int(round(float(segment.get('width', 1)))), 1), 0xFF)
+        except (KeyError, TypeError, ValueError):
+            continue
+
+        tool = segment.get('tool', 'brush')
+        tool_idx = TOOLS.index(tool) if tool in TOOLS else 0
+        color = str(segment.get('color', '#000000')).lower()
+        color_idx = index.get(color, CUSTOM_COLOR)
+        rgb = _parse_rgb(color) if color_idx == CUSTOM_COLOR else None
+        key = (tool_idx, color_idx, width, rgb)
+
+        if key != run_key or run_count == MAX_RUN_LENGTH:
+            if run_key is not None:
+                _LINE_RUN.pack_into(out, run_header_at, RUN_LINE, *run_key[:3], run_count)
+            # Reserve the run header; the count is patched in when the run closes
+            run_key = key
+            run_header_at = len(out)
+            run_count = 0
+            out.extend(bytes(_LINE_RUN.size))
+            if rgb is not None:
+                out.extend(_RGB.pack(*rgb))
+
+        out.extend(coords)
+        run_count += 1
+
+    if run_key is not None:
+        _LINE_RUN.pack_into(out, run_header_at, RUN_LINE, *run_key[:3], run_count)
+
+    return bytes(out)
+
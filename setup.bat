@@ -4,12 +4,20 @@ echo Setting up Party Games...
 REM Check if Python is installed
 python --version >nul 2>&1
 if errorlevel 1 (
-    echo Python is not installed. Please install Python 3.7+ from https://www.python.org/downloads/
+    echo Python is not installed. Please install Python 3.10+ from https://www.python.org/downloads/
     echo Make sure to check "Add Python to PATH" during installation
     pause
     exit /b 1
 )
 
+REM Dataclass slots (used by the game models) need Python 3.10
+python -c "import sys; sys.exit(sys.version_info < (3, 10))"
+if errorlevel 1 (
+    echo Python 3.10+ is required. Please install it from https://www.python.org/downloads/
+    pause
+    exit /b 1
+)
+
 REM Remove existing virtual environment if it exists
 if exist venv (
     echo Removing existing virtual environment...
@@ -49,6 +57,10 @@ echo Installing QR Code...
 python -m pip install qrcode
 echo Installing SQLAlchemy...
 python -m pip install sqlalchemy
+echo Installing sortedcontainers...
+python -m pip install sortedcontainers
+echo Installing orjson...
+python -m pip install orjson
 echo Installing aiosqlite...
 python -m pip install aiosqlite
 echo Installing python-jose...
@@ -4,6 +4,7 @@ setup(
     name="party-games",
     version="1.0.0",
     packages=find_packages(),
+    python_requires=">=3.10",
     install_requires=[
         "fastapi",
         "uvicorn",
@@ -14,5 +15,7 @@ setup(
         "python-multipart",
         "pillow",
         "requests",
+        "sortedcontainers",
+        "orjson",
     ],
 )
\ No newline at end of file
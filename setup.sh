@@ -14,11 +14,17 @@ if ! command -v python3 &> /dev/null; then
         # macOS
         brew install python3
     else
-        echo "Could not install Python. Please install Python 3.7+ manually."
+        echo "Could not install Python. Please install Python 3.10+ manually."
         exit 1
     fi
 fi
 
+# Dataclass slots (used by the game models) need Python 3.10
+if ! python3 -c 'import sys; sys.exit(sys.version_info < (3, 10))'; then
+    echo "Python 3.10+ is required (found $(python3 --version)). Please upgrade Python."
+    exit 1
+fi
+
 # Create virtual environment
 echo "Creating virtual environment..."
 python3 -m pip install --user virtualenv